@@ -132,8 +132,17 @@ def validate_document(doc_path):
 
 def condense_xml(xml_file):
     """移除不必要的空白字符和注释。"""
-    with open(xml_file, "r", encoding="utf-8") as f:
-        dom = defusedxml.minidom.parse(f)
+    with open(xml_file, "rb") as f:
+        content = condense_xml_bytes(f.read())
+
+    # 写回压缩后的 XML
+    with open(xml_file, "wb") as f:
+        f.write(content)
+
+
+def condense_xml_bytes(content):
+    """condense_xml 的内存版本：接收并返回 XML 字节串。"""
+    dom = defusedxml.minidom.parseString(content)
 
     # 处理每个元素以移除空白字符和注释
     for element in dom.getElementsByTagName("*"):
@@ -150,9 +159,7 @@ def condense_xml(xml_file):
             ) or child.nodeType == child.COMMENT_NODE:
                 element.removeChild(child)
 
-    # 写回压缩后的 XML
-    with open(xml_file, "wb") as f:
-        f.write(dom.toxml(encoding="UTF-8"))
+    return dom.toxml(encoding="UTF-8")
 
 
 if __name__ == "__main__":
@@ -3,10 +3,94 @@
 """
 
 import re
+from collections import OrderedDict
 from pathlib import Path
 
 import lxml.etree
 
+# 共享的 XML 解析器：复用同一实例避免每次解析重新配置；
+# 验证过程不使用 getElementById，因此关闭 ID 表收集
+XML_PARSER = lxml.etree.XMLParser(huge_tree=True, collect_ids=False)
+
+# 已解析 XML 的进程级 LRU 缓存: 解析后的路径 -> ((inode, mtime_ns, size), 根元素)
+# 供多个验证器共享同一份 document.xml 解析结果；文件被修改或替换后自动失效。
+# 解析后的树占用内存较大，只保留最近使用的 _PARSED_ROOTS_MAX 个。
+_PARSED_ROOTS = OrderedDict()
+_PARSED_ROOTS_MAX = 16
+
+
+def _file_stamp(path):
+    """返回标识文件当前版本的 (inode, mtime_ns, size)。
+
+    以 os.replace 写入的新文件总有新的 inode，因此即使文件系统的 mtime
+    精度较粗、大小也未变，替换后的文件也不会被误认为未改动。
+    """
+    stat = path.stat()
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def parse_xml_cached(xml_path):
+    """解析 XML 文件并返回根元素，同一未修改文件在各验证器间只解析一次。
+
+    返回的树由所有调用方共享，调用方不得就地修改；需要修改时请先复制。
+    """
+    path = Path(xml_path).resolve()
+    stamp = _file_stamp(path)
+    cached = _PARSED_ROOTS.get(path)
+    if cached is not None and cached[0] == stamp:
+        _PARSED_ROOTS.move_to_end(path)
+        return cached[1]
+    root = lxml.etree.parse(str(path), XML_PARSER).getroot()
+    _PARSED_ROOTS[path] = (stamp, root)
+    _PARSED_ROOTS.move_to_end(path)
+    if len(_PARSED_ROOTS) > _PARSED_ROOTS_MAX:
+        _PARSED_ROOTS.popitem(last=False)
+    return root
+
+
+def evict_cached_results(root_dir):
+    """丢弃 root_dir 下所有文件的缓存结果，例如在删除临时目录之前调用。"""
+    root_dir = Path(root_dir).resolve()
+    for path in [path for path in _PARSED_ROOTS if path.is_relative_to(root_dir)]:
+        del _PARSED_ROOTS[path]
+    for key in [key for key in _XSD_RESULTS if key[0].is_relative_to(root_dir)]:
+        del _XSD_RESULTS[key]
+
+
+# 已编译 XSD 架构的进程级缓存: 架构路径 -> lxml.etree.XMLSchema
+# 编译 OOXML 架构（含全部 import）远比验证单个部件昂贵，每个架构只编译一次。
+_COMPILED_SCHEMAS = {}
+
+
+def load_schema_cached(schema_path):
+    """加载并编译 XSD 架构，同一架构在进程内只编译一次。"""
+    schema = _COMPILED_SCHEMAS.get(schema_path)
+    if schema is None:
+        with open(schema_path, "rb") as xsd_file:
+            xsd_doc = lxml.etree.parse(
+                xsd_file, parser=lxml.etree.XMLParser(), base_url=str(schema_path)
+            )
+        schema = lxml.etree.XMLSchema(xsd_doc)
+        _COMPILED_SCHEMAS[schema_path] = schema
+    return schema
+
+
+# 单个文件 XSD 验证结果的进程级缓存: (路径, 附加键...) -> ((inode, mtime_ns, size), 结果)
+# 重复验证同一文档时，自上次验证以来未改动的部件（以及从不改变的原始文件）不再重新验证；
+# 文件改动后新结果替换旧条目，而不是新增条目。
+_XSD_RESULTS = {}
+
+
+def _cached_xsd_result(key, compute):
+    """返回 key 对应文件（key[0]）的缓存结果，文件改动后调用 compute() 重新计算。"""
+    stamp = _file_stamp(key[0])
+    cached = _XSD_RESULTS.get(key)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    result = compute()
+    _XSD_RESULTS[key] = (stamp, result)
+    return result
+
 
 class BaseSchemaValidator:
     """文档文件的基础验证器，包含通用验证逻辑。"""
@@ -652,9 +736,10 @@ class BaseSchemaValidator:
         xml_file = Path(xml_file).resolve()
         unpacked_dir = self.unpacked_dir.resolve()
 
-        # 验证当前文件
-        is_valid, current_errors = self._validate_single_file_xsd(
-            xml_file, unpacked_dir
+        # 验证当前文件（未修改的文件复用上次结果）
+        is_valid, current_errors = _cached_xsd_result(
+            (xml_file, type(self)),
+            lambda: self._validate_single_file_xsd(xml_file, unpacked_dir),
         )
 
         if is_valid is None:
@@ -830,13 +915,8 @@ class BaseSchemaValidator:
             return None, None  # 跳过文件
 
         try:
-            # 加载架构
-            with open(schema_path, "rb") as xsd_file:
-                parser = lxml.etree.XMLParser()
-                xsd_doc = lxml.etree.parse(
-                    xsd_file, parser=parser, base_url=str(schema_path)
-                )
-                schema = lxml.etree.XMLSchema(xsd_doc)
+            # 加载架构（已编译的架构在进程内复用）
+            schema = load_schema_cached(schema_path)
 
             # 加载并预处理 XML
             with open(xml_file, "r") as f:
@@ -875,28 +955,35 @@ class BaseSchemaValidator:
         返回:
             集合: 来自原始文件的错误消息集合
         """
-        import tempfile
-        import zipfile
-
         # 解析两个路径以处理符号链接（例如 macOS 上的 /var 与 /private/var）
         xml_file = Path(xml_file).resolve()
         unpacked_dir = self.unpacked_dir.resolve()
         relative_path = xml_file.relative_to(unpacked_dir)
 
+        # 原始文件不变时，同一部件的原始错误只需计算一次
+        return _cached_xsd_result(
+            (self.original_file.resolve(), relative_path.as_posix(), type(self)),
+            lambda: self._extract_original_file_errors(relative_path),
+        )
+
+    def _extract_original_file_errors(self, relative_path):
+        """从原始文件中提取单个部件并返回其 XSD 验证错误。"""
+        import tempfile
+        import zipfile
+
         with tempfile.TemporaryDirectory() as temp_dir:
             temp_path = Path(temp_dir)
 
-            # 提取原始文件
+            # 仅从原始文件中提取对应的这一个文件，而不是解压整个归档
             with zipfile.ZipFile(self.original_file, "r") as zip_ref:
-                zip_ref.extractall(temp_path)
+                try:
+                    zip_ref.extract(relative_path.as_posix(), temp_path)
+                except KeyError:
+                    # 文件在原始文件中不存在，因此没有原始错误
+                    return set()
 
-            # 在原始文件中查找对应文件
             original_xml_file = temp_path / relative_path
 
-            if not original_xml_file.exists():
-                # 文件在原始文件中不存在，因此没有原始错误
-                return set()
-
             # 验证原始文件中的特定文件
             is_valid, errors = self._validate_single_file_xsd(
                 original_xml_file, temp_path
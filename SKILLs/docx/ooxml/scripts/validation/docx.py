@@ -2,13 +2,23 @@
 Word 文档 XML 文件的 XSD 架构验证器。
 """
 
-import re
-import tempfile
 import zipfile
 
 import lxml.etree
 
-from .base import BaseSchemaValidator
+from .base import BaseSchemaValidator, parse_xml_cached
+
+# XML 文本中可能出现、且 str.isspace() 视为空白的全部字符
+_WHITESPACE_CHARS = (
+    "\t\n\r \x85\xa0\u1680\u2000\u2001\u2002\u2003\u2004\u2005\u2006"
+    "\u2007\u2008\u2009\u200a\u2028\u2029\u202f\u205f\u3000"
+)
+
+
+def _text_preview(text, limit=50):
+    """返回文本的 repr 预览，超出长度时截断；先切片再 repr，避免处理整段长文本。"""
+    preview = repr(text[: limit + 10])
+    return preview[:limit] + "..." if len(preview) > limit else preview
 
 
 class DOCXSchemaValidator(BaseSchemaValidator):
@@ -17,10 +27,40 @@ class DOCXSchemaValidator(BaseSchemaValidator):
     # Word 特定命名空间
     WORD_2006_NAMESPACE = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
 
+    # 预先构造的带命名空间标签名，避免在循环中重复格式化字符串
+    _W_P = f"{{{WORD_2006_NAMESPACE}}}p"
+    _W_DEL = f"{{{WORD_2006_NAMESPACE}}}del"
+    _W_INS = f"{{{WORD_2006_NAMESPACE}}}ins"
+    _W_DELTEXT = f"{{{WORD_2006_NAMESPACE}}}delText"
+
+    # 预编译的 XPath 表达式，避免每次调用时重复解析表达式和命名空间映射
+    _XP_DEL_T = lxml.etree.XPath(
+        ".//w:del//w:t", namespaces={"w": WORD_2006_NAMESPACE}
+    )
+    # 以空白字符开头或结尾但缺少 xml:space="preserve" 的 w:t，筛选完全在 libxml2 中完成
+    _XP_BAD_WS = lxml.etree.XPath(
+        ".//w:t[string-length(.) > 0"
+        " and (contains($ws, substring(., 1, 1))"
+        " or contains($ws, substring(., string-length(.), 1)))"
+        " and not(@xml:space = 'preserve')]",
+        namespaces={"w": WORD_2006_NAMESPACE},
+    )
+
+    # 每项检查最多收集的错误条数，超出部分只计数不格式化
+    MAX_REPORTED_ERRORS = 200
+
     # Word 特定元素到关系类型的映射
     # 从空映射开始 - 在发现特定情况时添加
     ELEMENT_RELATIONSHIP_TYPES = {}
 
+    def __init__(self, unpacked_dir, original_file, verbose=False):
+        super().__init__(unpacked_dir, original_file, verbose=verbose)
+
+        # 预先筛选出 document.xml 文件，供仅检查正文的验证步骤使用
+        self._document_xml_files = [
+            f for f in self.xml_files if f.name == "document.xml"
+        ]
+
     def validate(self):
         """运行所有验证检查，如果全部通过则返回 True。"""
         # 测试 0: XML 格式良好性
@@ -74,47 +114,35 @@ class DOCXSchemaValidator(BaseSchemaValidator):
         验证包含空白字符的 w:t 元素是否具有 xml:space='preserve' 属性。
         """
         errors = []
+        omitted = 0
 
-        for xml_file in self.xml_files:
-            # 仅检查 document.xml 文件
-            if xml_file.name != "document.xml":
-                continue
-
+        for xml_file in self._document_xml_files:
             try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-
-                # 查找所有 w:t 元素
-                for elem in root.iter(f"{{{self.WORD_2006_NAMESPACE}}}t"):
-                    if elem.text:
-                        text = elem.text
-                        # 检查文本是否以空白字符开头或结尾
-                        if re.match(r"^\s.*", text) or re.match(r".*\s$", text):
-                            # 检查是否存在 xml:space="preserve" 属性
-                            xml_space_attr = f"{{{self.XML_NAMESPACE}}}space"
-                            if (
-                                xml_space_attr not in elem.attrib
-                                or elem.attrib[xml_space_attr] != "preserve"
-                            ):
-                                # 显示文本预览
-                                text_preview = (
-                                    repr(text)[:50] + "..."
-                                    if len(repr(text)) > 50
-                                    else repr(text)
-                                )
-                                errors.append(
-                                    f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                                    f"第 {elem.sourceline} 行: 包含空白字符的 w:t 元素缺少 xml:space='preserve' 属性: {text_preview}"
-                                )
-
-            except (lxml.etree.XMLSyntaxError, Exception) as e:
+                root = parse_xml_cached(xml_file)
+
+                # 查找以空白字符开头或结尾且缺少 xml:space="preserve" 属性的 w:t 元素
+                for elem in self._XP_BAD_WS(root, ws=_WHITESPACE_CHARS):
+                    if len(errors) >= self.MAX_REPORTED_ERRORS:
+                        omitted += 1
+                        continue
+                    # 显示文本预览
+                    text_preview = _text_preview(elem.text)
+                    errors.append(
+                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
+                        f"第 {elem.sourceline} 行: 包含空白字符的 w:t 元素缺少 xml:space='preserve' 属性: {text_preview}"
+                    )
+
+            except (lxml.etree.XMLSyntaxError, OSError) as e:
                 errors.append(
                     f"  {xml_file.relative_to(self.unpacked_dir)}: 错误: {e}"
                 )
 
-        if errors:
-            print(f"失败 - 发现 {len(errors)} 个空白字符保留违规:")
+        if errors or omitted:
+            print(f"失败 - 发现 {len(errors) + omitted} 个空白字符保留违规:")
             for error in errors:
                 print(error)
+            if omitted:
+                print(f"  ... 另有 {omitted} 个违规已省略")
             return False
         else:
             if self.verbose:
@@ -127,43 +155,37 @@ class DOCXSchemaValidator(BaseSchemaValidator):
         由于某种原因，XSD 验证无法捕获此问题，因此我们手动进行验证。
         """
         errors = []
+        omitted = 0
 
-        for xml_file in self.xml_files:
-            # 仅检查 document.xml 文件
-            if xml_file.name != "document.xml":
-                continue
-
+        for xml_file in self._document_xml_files:
             try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
+                root = parse_xml_cached(xml_file)
 
                 # 查找所有作为 w:del 元素后代的 w:t 元素
-                namespaces = {"w": self.WORD_2006_NAMESPACE}
-                xpath_expression = ".//w:del//w:t"
-                problematic_t_elements = root.xpath(
-                    xpath_expression, namespaces=namespaces
-                )
+                problematic_t_elements = self._XP_DEL_T(root)
                 for t_elem in problematic_t_elements:
                     if t_elem.text:
+                        if len(errors) >= self.MAX_REPORTED_ERRORS:
+                            omitted += 1
+                            continue
                         # 显示文本预览
-                        text_preview = (
-                            repr(t_elem.text)[:50] + "..."
-                            if len(repr(t_elem.text)) > 50
-                            else repr(t_elem.text)
-                        )
+                        text_preview = _text_preview(t_elem.text)
                         errors.append(
                             f"  {xml_file.relative_to(self.unpacked_dir)}: "
                             f"第 {t_elem.sourceline} 行: 在 <w:del> 内发现 <w:t>: {text_preview}"
                         )
 
-            except (lxml.etree.XMLSyntaxError, Exception) as e:
+            except (lxml.etree.XMLSyntaxError, OSError) as e:
                 errors.append(
                     f"  {xml_file.relative_to(self.unpacked_dir)}: 错误: {e}"
                 )
 
-        if errors:
-            print(f"失败 - 发现 {len(errors)} 个删除内容验证违规:")
+        if errors or omitted:
+            print(f"失败 - 发现 {len(errors) + omitted} 个删除内容验证违规:")
             for error in errors:
                 print(error)
+            if omitted:
+                print(f"  ... 另有 {omitted} 个违规已省略")
             return False
         else:
             if self.verbose:
@@ -174,16 +196,11 @@ class DOCXSchemaValidator(BaseSchemaValidator):
         """统计解包文档中的段落数量。"""
         count = 0
 
-        for xml_file in self.xml_files:
-            # 仅检查 document.xml 文件
-            if xml_file.name != "document.xml":
-                continue
-
+        for xml_file in self._document_xml_files:
             try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-                # 统计所有 w:p 元素
-                paragraphs = root.findall(f".//{{{self.WORD_2006_NAMESPACE}}}p")
-                count = len(paragraphs)
+                # 复用已缓存的解析结果，直接计数而不构建列表
+                root = parse_xml_cached(xml_file)
+                count = sum(1 for _ in root.iter(self._W_P))
             except Exception as e:
                 print(f"统计解包文档段落数时出错: {e}")
 
@@ -194,72 +211,92 @@ class DOCXSchemaValidator(BaseSchemaValidator):
         count = 0
 
         try:
-            # 创建临时目录以解包原始文件
-            with tempfile.TemporaryDirectory() as temp_dir:
-                # 解包原始 docx 文件
-                with zipfile.ZipFile(self.original_file, "r") as zip_ref:
-                    zip_ref.extractall(temp_dir)
-
-                # 解析 document.xml
-                doc_xml_path = temp_dir + "/word/document.xml"
-                root = lxml.etree.parse(doc_xml_path).getroot()
-
-                # 统计所有 w:p 元素
-                paragraphs = root.findall(f".//{{{self.WORD_2006_NAMESPACE}}}p")
-                count = len(paragraphs)
+            # 直接从 zip 中流式读取 document.xml，无需解压整个文件
+            with zipfile.ZipFile(self.original_file, "r") as zip_ref:
+                with zip_ref.open("word/document.xml") as stream:
+                    count = self._count_paragraphs(stream)
 
         except Exception as e:
             print(f"统计原始文档段落数时出错: {e}")
 
         return count
 
+    def _count_paragraphs(self, stream):
+        """使用 iterparse 流式统计 w:p 元素数量，处理过的元素随即释放。"""
+        count = 0
+        for _, elem in lxml.etree.iterparse(
+            stream, events=("end",), tag=self._W_P
+        ):
+            count += 1
+            elem.clear(keep_tail=True)
+        return count
+
     def validate_insertions(self):
         """
         验证 w:delText 元素不在 w:ins 元素内。
         w:delText 仅在嵌套于 w:del 内时才允许出现在 w:ins 中。
         """
         errors = []
+        omitted = 0
 
-        for xml_file in self.xml_files:
-            if xml_file.name != "document.xml":
-                continue
-
+        for xml_file in self._document_xml_files:
             try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-                namespaces = {"w": self.WORD_2006_NAMESPACE}
+                root = parse_xml_cached(xml_file)
 
                 # 查找不在 w:del 内的 w:ins 中的 w:delText
-                invalid_elements = root.xpath(
-                    ".//w:ins//w:delText[not(ancestor::w:del)]",
-                    namespaces=namespaces
-                )
+                invalid_elements = self._find_delText_outside_del(root)
 
                 for elem in invalid_elements:
-                    text_preview = (
-                        repr(elem.text or "")[:50] + "..."
-                        if len(repr(elem.text or "")) > 50
-                        else repr(elem.text or "")
-                    )
+                    if len(errors) >= self.MAX_REPORTED_ERRORS:
+                        omitted += 1
+                        continue
+                    text_preview = _text_preview(elem.text or "")
                     errors.append(
                         f"  {xml_file.relative_to(self.unpacked_dir)}: "
                         f"第 {elem.sourceline} 行: <w:ins> 内的 <w:delText>: {text_preview}"
                     )
 
-            except (lxml.etree.XMLSyntaxError, Exception) as e:
+            except (lxml.etree.XMLSyntaxError, OSError) as e:
                 errors.append(
                     f"  {xml_file.relative_to(self.unpacked_dir)}: 错误: {e}"
                 )
 
-        if errors:
-            print(f"失败 - 发现 {len(errors)} 个插入内容验证违规:")
+        if errors or omitted:
+            print(f"失败 - 发现 {len(errors) + omitted} 个插入内容验证违规:")
             for error in errors:
                 print(error)
+            if omitted:
+                print(f"  ... 另有 {omitted} 个违规已省略")
             return False
         else:
             if self.verbose:
                 print("通过 - 未在 w:ins 元素内发现 w:delText 元素")
             return True
 
+    def _find_delText_outside_del(self, root):
+        """单次遍历查找位于 w:ins 内但不在 w:del 内的 w:delText 元素。
+
+        通过 start/end 事件维护 w:ins 与 w:del 的嵌套深度，
+        避免 XPath 的 ancestor 轴对每个匹配元素重复回溯祖先链。
+        """
+        invalid_elements = []
+        ins_depth = 0
+        del_depth = 0
+        for event, elem in lxml.etree.iterwalk(root, events=("start", "end")):
+            tag = elem.tag
+            if tag == self._W_INS:
+                ins_depth += 1 if event == "start" else -1
+            elif tag == self._W_DEL:
+                del_depth += 1 if event == "start" else -1
+            elif (
+                tag == self._W_DELTEXT
+                and event == "start"
+                and ins_depth
+                and not del_depth
+            ):
+                invalid_elements.append(elem)
+        return invalid_elements
+
     def compare_paragraph_counts(self):
         """比较原始文档和新文档之间的段落数量。"""
         original_count = self.count_paragraphs_in_original()
@@ -2,22 +2,39 @@
 Word 文档中跟踪更改的验证器。
 """
 
+import copy
+import difflib
 import subprocess
 import tempfile
 import zipfile
 from pathlib import Path
 
+import lxml.etree
+
+from .base import XML_PARSER, parse_xml_cached
+
 
 class RedliningValidator:
     """Word 文档中跟踪更改的验证器。"""
 
+    WORD_2006_NAMESPACE = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+    # 预先构造的带命名空间标签名，避免在循环中重复格式化字符串
+    _W_T = f"{{{WORD_2006_NAMESPACE}}}t"
+    _W_P = f"{{{WORD_2006_NAMESPACE}}}p"
+    _W_DEL = f"{{{WORD_2006_NAMESPACE}}}del"
+    _W_INS = f"{{{WORD_2006_NAMESPACE}}}ins"
+    _W_DELTEXT = f"{{{WORD_2006_NAMESPACE}}}delText"
+    _W_AUTHOR = f"{{{WORD_2006_NAMESPACE}}}author"
+
+    # 超过此字符数的差异块交给 git 处理，避免进程内字符级匹配耗时过长
+    MAX_INPROCESS_DIFF_CHARS = 20000
+
     def __init__(self, unpacked_dir, original_docx, verbose=False):
         self.unpacked_dir = Path(unpacked_dir)
         self.original_docx = Path(original_docx)
         self.verbose = verbose
-        self.namespaces = {
-            "w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
-        }
+        self.namespaces = {"w": self.WORD_2006_NAMESPACE}
 
     def validate(self):
         """主验证方法，如果验证通过返回 True，否则返回 False。"""
@@ -29,29 +46,17 @@ class RedliningValidator:
 
         # 首先，检查是否存在 Claude 添加的需要验证的跟踪更改
         try:
-            import xml.etree.ElementTree as ET
-
-            tree = ET.parse(modified_file)
-            root = tree.getroot()
-
-            # 检查由 Claude 创作的 w:del 或 w:ins 标签
-            del_elements = root.findall(".//w:del", self.namespaces)
-            ins_elements = root.findall(".//w:ins", self.namespaces)
-
-            # 仅筛选 Claude 的更改
-            claude_del_elements = [
-                elem
-                for elem in del_elements
-                if elem.get(f"{{{self.namespaces['w']}}}author") == "Claude"
-            ]
-            claude_ins_elements = [
-                elem
-                for elem in ins_elements
-                if elem.get(f"{{{self.namespaces['w']}}}author") == "Claude"
-            ]
+            # 与 DOCXSchemaValidator 共享同一份 document.xml 解析结果
+            root = parse_xml_cached(modified_file)
+
+            # 检查由 Claude 创作的 w:del 或 w:ins 标签，找到第一个即可停止
+            has_claude_changes = any(
+                elem.get(self._W_AUTHOR) == "Claude"
+                for elem in root.iter(self._W_DEL, self._W_INS)
+            )
 
             # 仅当使用了 Claude 的跟踪更改时才需要进行红线验证
-            if not claude_del_elements and not claude_ins_elements:
+            if not has_claude_changes:
                 if self.verbose:
                     print("通过 - 未找到 Claude 的跟踪更改。")
                 return True
@@ -60,56 +65,48 @@ class RedliningValidator:
             # 如果无法解析 XML，继续进行完整验证
             pass
 
-        # 创建临时目录用于解压原始 docx 文件
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir)
-
-            # 解压原始 docx 文件
-            try:
-                with zipfile.ZipFile(self.original_docx, "r") as zip_ref:
-                    zip_ref.extractall(temp_path)
-            except Exception as e:
-                print(f"失败 - 解压原始 docx 文件时出错：{e}")
-                return False
-
-            original_file = temp_path / "word" / "document.xml"
-            if not original_file.exists():
-                print(
-                    f"失败 - 在 {self.original_docx} 中未找到原始 document.xml 文件"
-                )
-                return False
-
-            # 使用 xml.etree.ElementTree 解析两个 XML 文件以进行红线验证
-            try:
-                import xml.etree.ElementTree as ET
-
-                modified_tree = ET.parse(modified_file)
-                modified_root = modified_tree.getroot()
-                original_tree = ET.parse(original_file)
-                original_root = original_tree.getroot()
-            except ET.ParseError as e:
-                print(f"失败 - 解析 XML 文件时出错：{e}")
-                return False
-
-            # 从两个文档中移除 Claude 的跟踪更改
-            self._remove_claude_tracked_changes(original_root)
-            self._remove_claude_tracked_changes(modified_root)
-
-            # 提取并比较文本内容
-            modified_text = self._extract_text_content(modified_root)
-            original_text = self._extract_text_content(original_root)
-
-            if modified_text != original_text:
-                # 显示每个段落的详细字符级差异
-                error_message = self._generate_detailed_diff(
-                    original_text, modified_text
-                )
-                print(error_message)
-                return False
+        # 仅从原始 docx 中读取 document.xml，无需解压整个文件
+        try:
+            with zipfile.ZipFile(self.original_docx, "r") as zip_ref:
+                original_bytes = zip_ref.read("word/document.xml")
+        except KeyError:
+            print(f"失败 - 在 {self.original_docx} 中未找到原始 document.xml 文件")
+            return False
+        except Exception as e:
+            print(f"失败 - 解压原始 docx 文件时出错：{e}")
+            return False
 
-            if self.verbose:
-                print("通过 - Claude 的所有更改都已正确跟踪")
-            return True
+        # 使用 lxml 解析两个 XML 文件以进行红线验证
+        # 修改后的文档复用共享的解析结果，因后续会就地移除更改，需先复制
+        try:
+            modified_root = copy.deepcopy(parse_xml_cached(modified_file))
+            original_root = lxml.etree.fromstring(original_bytes, XML_PARSER)
+        except lxml.etree.XMLSyntaxError as e:
+            print(f"失败 - 解析 XML 文件时出错：{e}")
+            return False
+
+        # 从两个文档中移除 Claude 的跟踪更改
+        self._remove_claude_tracked_changes(original_root)
+        self._remove_claude_tracked_changes(modified_root)
+
+        # 按段落提取并比较文本内容，避免拼接整篇文档再比较
+        modified_paragraphs = self._extract_text_content(modified_root)
+        original_paragraphs = self._extract_text_content(original_root)
+
+        if modified_paragraphs != original_paragraphs:
+            # 仅对首尾相同段落之间的不一致部分生成详细的字符级差异
+            original_text, modified_text = self._changed_paragraph_text(
+                original_paragraphs, modified_paragraphs
+            )
+            error_message = self._generate_detailed_diff(
+                original_text, modified_text
+            )
+            print(error_message)
+            return False
+
+        if self.verbose:
+            print("通过 - Claude 的所有更改都已正确跟踪")
+        return True
 
     def _generate_detailed_diff(self, original_text, modified_text):
         """使用 git 单词差异生成详细的单词级差异。"""
@@ -127,15 +124,65 @@ class RedliningValidator:
             "",
         ]
 
-        # 显示 git 单词差异
-        git_diff = self._get_git_word_diff(original_text, modified_text)
-        if git_diff:
-            error_parts.extend(["差异：", "============", git_diff])
+        # 显示字符级差异（大差异回退到 git 单词差异）
+        word_diff = self._get_word_diff(original_text, modified_text)
+        if word_diff:
+            error_parts.extend(["差异：", "============", word_diff])
         else:
             error_parts.append("无法生成单词差异（git 不可用）")
 
         return "\n".join(error_parts)
 
+    def _get_word_diff(self, original_text, modified_text):
+        """生成 git --word-diff=plain 格式的字符级差异。
+
+        先按段落定位更改，再在进程内对更改的段落做字符级比较；
+        仅当更改内容过大时才启动 git 子进程。
+        """
+        original_lines = original_text.split("\n")
+        modified_lines = modified_text.split("\n")
+        matcher = difflib.SequenceMatcher(
+            None, original_lines, modified_lines, autojunk=False
+        )
+
+        hunks = []
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "equal":
+                continue
+            old = "\n".join(original_lines[i1:i2])
+            new = "\n".join(modified_lines[j1:j2])
+            if len(old) + len(new) > self.MAX_INPROCESS_DIFF_CHARS:
+                return self._get_git_word_diff(original_text, modified_text)
+            hunks.append((old, new))
+
+        content_lines = []
+        for old, new in hunks:
+            for line in self._inline_char_diff(old, new).split("\n"):
+                if line.strip():
+                    content_lines.append(line)
+        return "\n".join(content_lines) or None
+
+    def _inline_char_diff(self, old, new):
+        """用 [-删除-] 和 {+插入+} 标记两段文本间的字符级差异。"""
+        parts = []
+        matcher = difflib.SequenceMatcher(None, old, new, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "equal":
+                parts.append(old[i1:i2])
+                continue
+            # 与 git 一致，标记不跨行：按换行拆分后逐段包裹
+            if i2 > i1:
+                segments = old[i1:i2].split("\n")
+                parts.append(
+                    "\n".join(f"[-{seg}-]" if seg else "" for seg in segments)
+                )
+            if j2 > j1:
+                segments = new[j1:j2].split("\n")
+                parts.append(
+                    "\n".join(f"{{+{seg}+}}" if seg else "" for seg in segments)
+                )
+        return "".join(parts)
+
     def _get_git_word_diff(self, original_text, modified_text):
         """使用 git 生成具有字符级精度的单词差异。"""
         try:
@@ -181,33 +228,6 @@ class RedliningValidator:
                     if content_lines:
                         return "\n".join(content_lines)
 
-                # 如果字符级差异过于冗长，回退到单词级差异
-                result = subprocess.run(
-                    [
-                        "git",
-                        "diff",
-                        "--word-diff=plain",
-                        "-U0",  # 零行上下文
-                        "--no-index",
-                        str(original_file),
-                        str(modified_file),
-                    ],
-                    capture_output=True,
-                    text=True,
-                )
-
-                if result.stdout.strip():
-                    lines = result.stdout.split("\n")
-                    content_lines = []
-                    in_content = False
-                    for line in lines:
-                        if line.startswith("@@"):
-                            in_content = True
-                            continue
-                        if in_content and line.strip():
-                            content_lines.append(line)
-                    return "\n".join(content_lines)
-
         except (subprocess.CalledProcessError, FileNotFoundError, Exception):
             # Git 不可用或其他错误，返回 None 以使用回退方案
             pass
@@ -216,54 +236,66 @@ class RedliningValidator:
 
     def _remove_claude_tracked_changes(self, root):
         """从 XML 根节点中移除 Claude 创作的跟踪更改。"""
-        ins_tag = f"{{{self.namespaces['w']}}}ins"
-        del_tag = f"{{{self.namespaces['w']}}}del"
-        author_attr = f"{{{self.namespaces['w']}}}author"
+        # 单次遍历同时收集 Claude 的 w:ins 和 w:del（先收集再修改，避免遍历中修改树）
+        claude_ins = []
+        claude_dels = []
+        for elem in root.iter(self._W_INS, self._W_DEL):
+            if elem.get(self._W_AUTHOR) == "Claude":
+                if elem.tag == self._W_INS:
+                    claude_ins.append(elem)
+                else:
+                    claude_dels.append(elem)
 
         # 移除 w:ins 元素
-        for parent in root.iter():
-            to_remove = []
-            for child in parent:
-                if child.tag == ins_tag and child.get(author_attr) == "Claude":
-                    to_remove.append(child)
-            for elem in to_remove:
+        for elem in claude_ins:
+            parent = elem.getparent()
+            if parent is not None:
                 parent.remove(elem)
 
         # 展开作者为 "Claude" 的 w:del 元素中的内容
-        deltext_tag = f"{{{self.namespaces['w']}}}delText"
-        t_tag = f"{{{self.namespaces['w']}}}t"
-
-        for parent in root.iter():
-            to_process = []
-            for child in parent:
-                if child.tag == del_tag and child.get(author_attr) == "Claude":
-                    to_process.append((child, list(parent).index(child)))
-
-            # 按逆序处理以保持索引
-            for del_elem, del_index in reversed(to_process):
-                # 在移动前将 w:delText 转换为 w:t
-                for elem in del_elem.iter():
-                    if elem.tag == deltext_tag:
-                        elem.tag = t_tag
-
-                # 在移除 w:del 之前将其所有子元素移动到其父元素
-                for child in reversed(list(del_elem)):
-                    parent.insert(del_index, child)
-                parent.remove(del_elem)
+        for del_elem in claude_dels:
+            parent = del_elem.getparent()
+            if parent is None:
+                continue
+
+            # 在移动前将 w:delText 转换为 w:t
+            for elem in del_elem.iter(self._W_DELTEXT):
+                elem.tag = self._W_T
+
+            # 在移除 w:del 之前将其所有子元素按原顺序移动到其前面
+            for child in list(del_elem):
+                del_elem.addprevious(child)
+            parent.remove(del_elem)
+
+    def _changed_paragraph_text(self, original_paragraphs, modified_paragraphs):
+        """去掉首尾相同的段落，返回两侧不一致部分的文本。"""
+        limit = min(len(original_paragraphs), len(modified_paragraphs))
+        start = 0
+        while (
+            start < limit and original_paragraphs[start] == modified_paragraphs[start]
+        ):
+            start += 1
+        end = 0
+        while (
+            end < limit - start
+            and original_paragraphs[-1 - end] == modified_paragraphs[-1 - end]
+        ):
+            end += 1
+        return (
+            "\n".join(original_paragraphs[start : len(original_paragraphs) - end]),
+            "\n".join(modified_paragraphs[start : len(modified_paragraphs) - end]),
+        )
 
     def _extract_text_content(self, root):
-        """从 Word XML 中提取文本内容，保留段落结构。
+        """从 Word XML 中按段落提取文本内容，返回段落文本列表。
 
         跳过空段落以避免当跟踪插入仅添加结构元素而无文本内容时产生误报。
         """
-        p_tag = f"{{{self.namespaces['w']}}}p"
-        t_tag = f"{{{self.namespaces['w']}}}t"
-
         paragraphs = []
-        for p_elem in root.findall(f".//{p_tag}"):
+        for p_elem in root.iter(self._W_P):
             # 获取此段落内的所有文本元素
             text_parts = []
-            for t_elem in p_elem.findall(f".//{t_tag}"):
+            for t_elem in p_elem.iter(self._W_T):
                 if t_elem.text:
                     text_parts.append(t_elem.text)
             paragraph_text = "".join(text_parts)
@@ -271,7 +303,7 @@ class RedliningValidator:
             if paragraph_text:
                 paragraphs.append(paragraph_text)
 
-        return "\n".join(paragraphs)
+        return paragraphs
 
 
 if __name__ == "__main__":
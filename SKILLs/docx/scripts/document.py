@@ -24,25 +24,213 @@
 
     # 保存
     doc.save()
+    data = doc.to_bytes()  # 直接打包为 .docx 字节，不写回目录
 """
 
-import html
-import random
+import copy
+import io
+import os
+import re
 import shutil
 import tempfile
+import zipfile
 from datetime import datetime, timezone
 from pathlib import Path
 
-from defusedxml import minidom
-from ooxml.scripts.pack import pack_document
+import lxml.etree
+from lxml.etree import SubElement
+from ooxml.scripts.pack import condense_xml_bytes, pack_document
+from ooxml.scripts.validation.base import evict_cached_results
 from ooxml.scripts.validation.docx import DOCXSchemaValidator
 from ooxml.scripts.validation.redlining import RedliningValidator
 
-from .utilities import XMLEditor
+from .utilities import XML_PARSER, XMLEditor
 
 # 模板文件路径
 TEMPLATE_DIR = Path(__file__).parent / "templates"
 
+# 命名空间
+WORD_NAMESPACE = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+W14_NAMESPACE = "http://schemas.microsoft.com/office/word/2010/wordml"
+W15_NAMESPACE = "http://schemas.microsoft.com/office/word/2012/wordml"
+W16CID_NAMESPACE = "http://schemas.microsoft.com/office/word/2016/wordml/cid"
+W16DU_NAMESPACE = "http://schemas.microsoft.com/office/word/2023/wordml/word16du"
+W16CEX_NAMESPACE = "http://schemas.microsoft.com/office/word/2018/wordml/cex"
+
+# findall 路径使用的前缀映射
+_NS = {"w": WORD_NAMESPACE}
+
+_W = f"{{{WORD_NAMESPACE}}}"
+_W14 = f"{{{W14_NAMESPACE}}}"
+_W15 = f"{{{W15_NAMESPACE}}}"
+_W16CID = f"{{{W16CID_NAMESPACE}}}"
+_W16DU = f"{{{W16DU_NAMESPACE}}}"
+_W16CEX = f"{{{W16CEX_NAMESPACE}}}"
+_XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+
+# lxml 使用的限定标签名
+_W_P = f"{_W}p"
+_W_R = f"{_W}r"
+_W_T = f"{_W}t"
+_W_DELTEXT = f"{_W}delText"
+_W_INS = f"{_W}ins"
+_W_DEL = f"{_W}del"
+_W_PPR = f"{_W}pPr"
+_W_RPR = f"{_W}rPr"
+_W_NUMPR = f"{_W}numPr"
+_W_COMMENT = f"{_W}comment"
+_W_COMMENT_RANGE_START = f"{_W}commentRangeStart"
+_W_COMMENT_RANGE_END = f"{_W}commentRangeEnd"
+_W_COMMENT_REFERENCE = f"{_W}commentReference"
+_W16CEX_COMMENT_EXTENSIBLE = f"{_W16CEX}commentExtensible"
+
+# lxml 使用的限定属性名
+_W_ID = f"{_W}id"
+_W_VAL = f"{_W}val"
+_W_RSID_R = f"{_W}rsidR"
+_W_RSID_DEL = f"{_W}rsidDel"
+_W_RSID_R_DEFAULT = f"{_W}rsidRDefault"
+_W_RSID_P = f"{_W}rsidP"
+_W_AUTHOR = f"{_W}author"
+_W_DATE = f"{_W}date"
+_W_INITIALS = f"{_W}initials"
+_W14_PARA_ID = f"{_W14}paraId"
+_W14_TEXT_ID = f"{_W14}textId"
+_W16DU_DATE_UTC = f"{_W16DU}dateUtc"
+_W16CEX_DATE_UTC = f"{_W16CEX}dateUtc"
+
+# settings.xml 中按 w:settings 直接子元素查找的标签
+_W_TRACK_REVISIONS = f"{_W}trackRevisions"
+_W_DOCUMENT_PROTECTION = f"{_W}documentProtection"
+_W_DEFAULT_TAB_STOP = f"{_W}defaultTabStop"
+_W_RSIDS = f"{_W}rsids"
+_W_RSID = f"{_W}rsid"
+_W_COMPAT = f"{_W}compat"
+_W_CLR_SCHEME_MAPPING = f"{_W}clrSchemeMapping"
+
+# XML 规范中的空白字符（S 产生式），首尾出现时 w:t 需要 xml:space="preserve"
+_XML_WHITESPACE = frozenset(" \t\r\n")
+
+
+# _make_element 使用的空元素模板，按标签缓存；模板本身从不插入文档
+_ELEMENT_TEMPLATES = {}
+
+
+# suggest_paragraph 快速路径：<w:p ...> 开始标签、可选的前导 <w:pPr> 和其余内容
+_PARAGRAPH_RE = re.compile(
+    r"(?P<open><w:p(?:\s+[^\s=>/]+\s*=\s*(?:\"[^\"]*\"|'[^']*'))*\s*>)"
+    r"(?:<w:pPr>(?P<ppr_body>.*?)</w:pPr>)?"
+    r"(?P<body>.*)</w:p>",
+    re.S,
+)
+
+
+def _suggest_paragraph_fast(xml_content):
+    """suggest_paragraph 的字符串快速路径；输入不是常见形式时返回 None。"""
+    match = _PARAGRAPH_RE.fullmatch(xml_content.strip())
+    if match is None:
+        return None
+    body = match["body"]
+    ppr_body = match["ppr_body"] or ""
+    # pPr 不在开头、多个/嵌套段落、嵌套 pPr（如 w:pPrChange）都交给解析路径处理
+    if "<w:pPr" in body or "</w:p>" in body or "<w:pPr" in ppr_body:
+        return None
+    if "<w:rPr>" in ppr_body:
+        ppr_body = ppr_body.replace("<w:rPr>", "<w:rPr><w:ins/>", 1)
+    elif "<w:rPr" in ppr_body:
+        # 带属性或自闭合的 w:rPr
+        return None
+    else:
+        ppr_body += "<w:rPr><w:ins/></w:rPr>"
+    return f"{match['open']}<w:pPr>{ppr_body}</w:pPr><w:ins>{body}</w:ins></w:p>"
+
+
+def _make_element(tag):
+    """创建一个独立的 w 命名空间元素，插入文档后沿用文档中的 w 前缀。
+
+    复制预先构建的空模板比每次调用 Element() 重新建立命名空间映射快得多。
+    """
+    template = _ELEMENT_TEMPLATES.get(tag)
+    if template is None:
+        template = lxml.etree.Element(tag, nsmap=_NS)
+        _ELEMENT_TEMPLATES[tag] = template
+    return copy.copy(template)
+
+
+def _make_comment_ref_run(comment_id):
+    """创建引用批注的 <w:r>（w:rStyle 为 CommentReference）。
+
+    运行的骨架只构建一次，之后每次深复制模板并设置 w:id。
+    w:rsidR 由 DocxXMLEditor 在插入时添加。
+    """
+    template = _ELEMENT_TEMPLATES.get("comment_ref_run")
+    if template is None:
+        template = lxml.etree.Element(_W_R, nsmap=_NS)
+        rpr = SubElement(template, _W_RPR)
+        SubElement(rpr, f"{_W}rStyle", {_W_VAL: "CommentReference"})
+        SubElement(template, _W_COMMENT_REFERENCE)
+        _ELEMENT_TEMPLATES["comment_ref_run"] = template
+    run = copy.deepcopy(template)
+    run[1].set(_W_ID, str(comment_id))
+    return run
+
+
+def _make_comment_marker(tag, comment_id):
+    """创建带 w:id 的 w:commentRangeStart 或 w:commentRangeEnd 元素。"""
+    marker = _make_element(tag)
+    marker.set(_W_ID, str(comment_id))
+    return marker
+
+
+def _max_change_id(elements):
+    """返回给定元素（含自身及后代）中 w:ins/w:del 的最大 w:id，没有时返回 -1。"""
+    max_id = -1
+    for elem in elements:
+        for change in elem.iter(_W_INS, _W_DEL):
+            change_id = change.get(_W_ID)
+            if change_id:
+                try:
+                    max_id = max(max_id, int(change_id))
+                except ValueError:
+                    pass
+    return max_id
+
+
+def _missing_attributes(elem, defaults):
+    """返回 defaults 中元素尚未设置的属性（新字典，可继续添加后一次性 update）。"""
+    attrib = elem.attrib
+    # 新插入的元素通常没有任何属性，直接复制 defaults
+    if not attrib:
+        return dict(defaults)
+    return {name: value for name, value in defaults.items() if name not in attrib}
+
+
+def _rename_attribute(elem, old, new, default):
+    """把属性 old 改名为 new；old 不存在时，仅在 new 缺失时设为 default。"""
+    attrib = elem.attrib
+    value = attrib.pop(old, None)
+    if value is not None:
+        attrib[new] = value
+    elif new not in attrib:
+        attrib[new] = default
+
+
+def _child_tag(parent, local):
+    """返回与 parent 同命名空间的标签名（OPC 部件通常使用默认命名空间）。"""
+    namespace = lxml.etree.QName(parent).namespace
+    return f"{{{namespace}}}{local}" if namespace else local
+
+
+def _utc_timestamp():
+    """返回修订和批注使用的当前 UTC 时间戳（精确到秒）。"""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _tag_name(elem):
+    """返回元素带前缀的标签名（例如 "w:p"），用于错误消息。"""
+    local = lxml.etree.QName(elem).localname
+    return f"{elem.prefix}:{local}" if elem.prefix else local
+
 
 class DocxXMLEditor(XMLEditor):
     """自动将 RSID、作者和日期应用到新元素的 XMLEditor。
@@ -53,7 +241,7 @@ class DocxXMLEditor(XMLEditor):
     - w:id（用于 w:ins 和 w:del 元素）
 
     属性:
-        dom (defusedxml.minidom.Document): 用于直接操作的 DOM 文档
+        dom (lxml.etree._ElementTree): 用于直接操作的 XML 树
     """
 
     def __init__(
@@ -71,49 +259,57 @@ class DocxXMLEditor(XMLEditor):
         self.rsid = rsid
         self.author = author
         self.initials = initials
+        # 下一个可用的变更 ID，首次分配时扫描整个文档后缓存
+        self._next_change_id = None
+        # 已确认在根元素上声明过的命名空间前缀，避免每次注入都重新检查
+        self._declared_prefixes = set()
 
     def _get_next_change_id(self):
-        """通过检查所有修订元素获取下一个可用的变更 ID。"""
-        max_id = -1
-        for tag in ("w:ins", "w:del"):
-            elements = self.dom.getElementsByTagName(tag)
-            for elem in elements:
-                change_id = elem.getAttribute("w:id")
-                if change_id:
-                    try:
-                        max_id = max(max_id, int(change_id))
-                    except ValueError:
-                        pass
-        return max_id + 1
+        """分配下一个可用的变更 ID。
+
+        只在首次调用时扫描全部修订元素，之后在缓存的计数器上递增；
+        导入片段中自带的 w:id 由 _inject_attributes_to_nodes 同步到计数器。
+        """
+        if self._next_change_id is None:
+            self._next_change_id = _max_change_id([self.dom.getroot()]) + 1
+        change_id = self._next_change_id
+        self._next_change_id += 1
+        return change_id
+
+    def _ensure_namespace(self, prefix, uri):
+        """确保根元素上以给定前缀声明了命名空间。
+
+        需要在使用该命名空间的属性设置之后调用：cleanup_namespaces 会把
+        声明提升到根元素，并把 lxml 自动生成的 ns0 等前缀改为给定前缀。
+        每个前缀在每个文档上只检查一次。
+        """
+        if prefix in self._declared_prefixes:
+            return
+        self._declared_prefixes.add(prefix)
+        root = self.dom.getroot()
+        if root.nsmap.get(prefix) == uri:
+            return
+        # 保留根元素上的全部前缀，mc:Ignorable 等属性值会引用它们
+        lxml.etree.cleanup_namespaces(
+            self.dom,
+            top_nsmap={prefix: uri},
+            keep_ns_prefixes=[p for p in root.nsmap if p],
+        )
+        self._nsmap = root.nsmap
 
     def _ensure_w16du_namespace(self):
         """确保根元素上声明了 w16du 命名空间。"""
-        root = self.dom.documentElement
-        if not root.hasAttribute("xmlns:w16du"):  # type: ignore
-            root.setAttribute(  # type: ignore
-                "xmlns:w16du",
-                "http://schemas.microsoft.com/office/word/2023/wordml/word16du",
-            )
+        self._ensure_namespace("w16du", W16DU_NAMESPACE)
 
     def _ensure_w16cex_namespace(self):
         """确保根元素上声明了 w16cex 命名空间。"""
-        root = self.dom.documentElement
-        if not root.hasAttribute("xmlns:w16cex"):  # type: ignore
-            root.setAttribute(  # type: ignore
-                "xmlns:w16cex",
-                "http://schemas.microsoft.com/office/word/2018/wordml/cex",
-            )
+        self._ensure_namespace("w16cex", W16CEX_NAMESPACE)
 
     def _ensure_w14_namespace(self):
         """确保根元素上声明了 w14 命名空间。"""
-        root = self.dom.documentElement
-        if not root.hasAttribute("xmlns:w14"):  # type: ignore
-            root.setAttribute(  # type: ignore
-                "xmlns:w14",
-                "http://schemas.microsoft.com/office/word/2010/wordml",
-            )
+        self._ensure_namespace("w14", W14_NAMESPACE)
 
-    def _inject_attributes_to_nodes(self, nodes):
+    def _inject_attributes_to_nodes(self, nodes, timestamp=None):
         """将 RSID、作者和日期属性注入到适用的 DOM 节点中。
 
         为支持属性的元素添加属性：
@@ -125,117 +321,105 @@ class DocxXMLEditor(XMLEditor):
         - w16cex:commentExtensible: 获取 w16cex:dateUtc
 
         参数:
-            nodes: 要处理的 DOM 节点列表
+            nodes: 要处理的元素列表
+            timestamp: 写入 w:date 等属性的 UTC 时间戳，默认取当前时间
         """
-        from datetime import datetime, timezone
+        if timestamp is None:
+            timestamp = _utc_timestamp()
 
-        timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        # 新内容可能自带 w:id，保证之后分配的 ID 不与之冲突
+        if self._next_change_id is not None:
+            self._next_change_id = max(self._next_change_id, _max_change_id(nodes) + 1)
 
-        def is_inside_deletion(elem):
-            """检查元素是否在 w:del 元素内部。"""
-            parent = elem.parentNode
-            while parent:
-                if parent.nodeType == parent.ELEMENT_NODE and parent.tagName == "w:del":
-                    return True
-                parent = parent.parentNode
-            return False
+        # 遍历过程中用到的命名空间，遍历结束后统一声明到根元素
+        pending_namespaces = set()
+
+        # 预先收集位于 w:del 内部的运行，避免为每个 w:r 向上遍历祖先链
+        deleted_runs = set()
+        for node in nodes:
+            if node.tag == _W_DEL or next(node.iterancestors(_W_DEL), None) is not None:
+                deleted_runs.update(node.iter(_W_R))
+            else:
+                for del_elem in node.iterdescendants(_W_DEL):
+                    deleted_runs.update(del_elem.iter(_W_R))
+
+        # 各类元素缺省时要补上的属性，每个元素只需一次 attrib.update
+        p_defaults = {
+            _W_RSID_R: self.rsid,
+            _W_RSID_R_DEFAULT: self.rsid,
+            _W_RSID_P: self.rsid,
+        }
+        change_defaults = {
+            _W_AUTHOR: self.author,
+            _W_DATE: timestamp,
+            # 为修订添加 w16du:dateUtc（与我们生成的 UTC 时间戳相同）
+            _W16DU_DATE_UTC: timestamp,
+        }
+        comment_defaults = {
+            _W_AUTHOR: self.author,
+            _W_DATE: timestamp,
+            _W_INITIALS: self.initials,
+        }
 
         def add_rsid_to_p(elem):
-            if not elem.hasAttribute("w:rsidR"):
-                elem.setAttribute("w:rsidR", self.rsid)
-            if not elem.hasAttribute("w:rsidRDefault"):
-                elem.setAttribute("w:rsidRDefault", self.rsid)
-            if not elem.hasAttribute("w:rsidP"):
-                elem.setAttribute("w:rsidP", self.rsid)
+            missing = _missing_attributes(elem, p_defaults)
             # 如果不存在则添加 w14:paraId 和 w14:textId
-            if not elem.hasAttribute("w14:paraId"):
-                self._ensure_w14_namespace()
-                elem.setAttribute("w14:paraId", _generate_hex_id())
-            if not elem.hasAttribute("w14:textId"):
-                self._ensure_w14_namespace()
-                elem.setAttribute("w14:textId", _generate_hex_id())
+            for name in (_W14_PARA_ID, _W14_TEXT_ID):
+                if name not in elem.attrib:
+                    missing[name] = _generate_hex_id()
+                    pending_namespaces.add(self._ensure_w14_namespace)
+            elem.attrib.update(missing)
 
         def add_rsid_to_r(elem):
             # 对于 <w:del> 内部的 <w:r> 使用 w:rsidDel，否则使用 w:rsidR
-            if is_inside_deletion(elem):
-                if not elem.hasAttribute("w:rsidDel"):
-                    elem.setAttribute("w:rsidDel", self.rsid)
-            else:
-                if not elem.hasAttribute("w:rsidR"):
-                    elem.setAttribute("w:rsidR", self.rsid)
+            name = _W_RSID_DEL if elem in deleted_runs else _W_RSID_R
+            if name not in elem.attrib:
+                elem.set(name, self.rsid)
 
         def add_tracked_change_attrs(elem):
+            missing = {}
             # 如果不存在则自动分配 w:id
-            if not elem.hasAttribute("w:id"):
-                elem.setAttribute("w:id", str(self._get_next_change_id()))
-            if not elem.hasAttribute("w:author"):
-                elem.setAttribute("w:author", self.author)
-            if not elem.hasAttribute("w:date"):
-                elem.setAttribute("w:date", timestamp)
-            # 为修订添加 w16du:dateUtc（与我们生成的 UTC 时间戳相同）
-            if elem.tagName in ("w:ins", "w:del") and not elem.hasAttribute(
-                "w16du:dateUtc"
-            ):
-                self._ensure_w16du_namespace()
-                elem.setAttribute("w16du:dateUtc", timestamp)
+            if _W_ID not in elem.attrib:
+                missing[_W_ID] = str(self._get_next_change_id())
+            missing.update(_missing_attributes(elem, change_defaults))
+            if _W16DU_DATE_UTC in missing:
+                pending_namespaces.add(self._ensure_w16du_namespace)
+            elem.attrib.update(missing)
 
         def add_comment_attrs(elem):
-            if not elem.hasAttribute("w:author"):
-                elem.setAttribute("w:author", self.author)
-            if not elem.hasAttribute("w:date"):
-                elem.setAttribute("w:date", timestamp)
-            if not elem.hasAttribute("w:initials"):
-                elem.setAttribute("w:initials", self.initials)
+            elem.attrib.update(_missing_attributes(elem, comment_defaults))
 
         def add_comment_extensible_date(elem):
             # 为批注可扩展元素添加 w16cex:dateUtc
-            if not elem.hasAttribute("w16cex:dateUtc"):
-                self._ensure_w16cex_namespace()
-                elem.setAttribute("w16cex:dateUtc", timestamp)
+            if _W16CEX_DATE_UTC not in elem.attrib:
+                elem.set(_W16CEX_DATE_UTC, timestamp)
+                pending_namespaces.add(self._ensure_w16cex_namespace)
 
         def add_xml_space_to_t(elem):
             # 如果文本有前导/尾随空格，则为 w:t 添加 xml:space="preserve"
-            if (
-                elem.firstChild
-                and elem.firstChild.nodeType == elem.firstChild.TEXT_NODE
-            ):
-                text = elem.firstChild.data
-                if text and (text[0].isspace() or text[-1].isspace()):
-                    if not elem.hasAttribute("xml:space"):
-                        elem.setAttribute("xml:space", "preserve")
-
+            text = elem.text
+            if not text or _XML_SPACE in elem.attrib:
+                return
+            if text[0] in _XML_WHITESPACE or text[-1] in _XML_WHITESPACE:
+                elem.set(_XML_SPACE, "preserve")
+
+        handlers = {
+            _W_P: add_rsid_to_p,
+            _W_R: add_rsid_to_r,
+            _W_T: add_xml_space_to_t,
+            _W_INS: add_tracked_change_attrs,
+            _W_DEL: add_tracked_change_attrs,
+            _W_COMMENT: add_comment_attrs,
+            _W16CEX_COMMENT_EXTENSIBLE: add_comment_extensible_date,
+        }
+
+        # 一次遍历处理节点本身及其所有后代，按标签分派
         for node in nodes:
-            if node.nodeType != node.ELEMENT_NODE:
-                continue
+            for elem in node.iter(*handlers):
+                handlers[elem.tag](elem)
 
-            # 处理节点本身
-            if node.tagName == "w:p":
-                add_rsid_to_p(node)
-            elif node.tagName == "w:r":
-                add_rsid_to_r(node)
-            elif node.tagName == "w:t":
-                add_xml_space_to_t(node)
-            elif node.tagName in ("w:ins", "w:del"):
-                add_tracked_change_attrs(node)
-            elif node.tagName == "w:comment":
-                add_comment_attrs(node)
-            elif node.tagName == "w16cex:commentExtensible":
-                add_comment_extensible_date(node)
-
-            # 处理后代元素（getElementsByTagName 不会返回元素本身）
-            for elem in node.getElementsByTagName("w:p"):
-                add_rsid_to_p(elem)
-            for elem in node.getElementsByTagName("w:r"):
-                add_rsid_to_r(elem)
-            for elem in node.getElementsByTagName("w:t"):
-                add_xml_space_to_t(elem)
-            for tag in ("w:ins", "w:del"):
-                for elem in node.getElementsByTagName(tag):
-                    add_tracked_change_attrs(elem)
-            for elem in node.getElementsByTagName("w:comment"):
-                add_comment_attrs(elem)
-            for elem in node.getElementsByTagName("w16cex:commentExtensible"):
-                add_comment_extensible_date(elem)
+        for ensure_namespace in pending_namespaces:
+            ensure_namespace()
 
     def replace_node(self, elem, new_content):
         """替换节点并自动注入属性。"""
@@ -249,6 +433,41 @@ class DocxXMLEditor(XMLEditor):
         self._inject_attributes_to_nodes(nodes)
         return nodes
 
+    def _insert_element_after(self, elem, new_elem):
+        """把已构建好的元素接到 elem 之后并自动注入属性。
+
+        与 insert_after 不同，new_elem 不经过序列化和重新解析；
+        其中的节点视为新内容，不保留原始行号。
+        """
+        return self._insert_elements(elem, [new_elem], "after")
+
+    def _insert_elements(self, elem, nodes, position):
+        """把已构建好的元素插入到 elem 之前、之后或作为其子节点追加，并注入属性。
+
+        参数:
+            elem: 定位用的元素
+            nodes: 要插入的元素列表
+            position: "before"、"after" 或 "append"
+
+        返回:
+            插入的元素列表
+        """
+        for new_elem in nodes:
+            for node in new_elem.iter():
+                node.sourceline = 0
+        if position == "append":
+            elem.extend(nodes)
+        elif position == "before":
+            for node in nodes:
+                elem.addprevious(node)
+        else:
+            anchor = elem
+            for node in nodes:
+                anchor.addnext(node)
+                anchor = node
+        self._inject_attributes_to_nodes(nodes)
+        return nodes
+
     def insert_before(self, elem, xml_content):
         """在元素之前插入并自动注入属性。"""
         nodes = super().insert_before(elem, xml_content)
@@ -287,55 +506,48 @@ class DocxXMLEditor(XMLEditor):
         """
         # 收集插入元素
         ins_elements = []
-        if elem.tagName == "w:ins":
+        if elem.tag == _W_INS:
             ins_elements.append(elem)
         else:
-            ins_elements.extend(elem.getElementsByTagName("w:ins"))
+            ins_elements.extend(elem.findall(".//w:ins", _NS))
 
         # 验证是否有要拒绝的插入元素
         if not ins_elements:
             raise ValueError(
                 f"revert_insertion requires w:ins elements. "
-                f"The provided element <{elem.tagName}> contains no insertions. "
+                f"The provided element <{_tag_name(elem)}> contains no insertions. "
             )
 
+        timestamp = _utc_timestamp()
+
         # 处理所有插入元素 - 将所有子元素包装在 w:del 中
         for ins_elem in ins_elements:
-            runs = list(ins_elem.getElementsByTagName("w:r"))
+            runs = ins_elem.findall(".//w:r", _NS)
             if not runs:
                 continue
 
             # 创建删除包装器
-            del_wrapper = self.dom.createElement("w:del")
+            del_wrapper = _make_element(_W_DEL)
 
             # 处理每个运行
             for run in runs:
                 # 转换 w:t → w:delText 和 w:rsidR → w:rsidDel
-                if run.hasAttribute("w:rsidR"):
-                    run.setAttribute("w:rsidDel", run.getAttribute("w:rsidR"))
-                    run.removeAttribute("w:rsidR")
-                elif not run.hasAttribute("w:rsidDel"):
-                    run.setAttribute("w:rsidDel", self.rsid)
-
-                for t_elem in list(run.getElementsByTagName("w:t")):
-                    del_text = self.dom.createElement("w:delText")
-                    # 复制所有子节点（不仅仅是 firstChild）以处理实体
-                    while t_elem.firstChild:
-                        del_text.appendChild(t_elem.firstChild)
-                    for i in range(t_elem.attributes.length):
-                        attr = t_elem.attributes.item(i)
-                        del_text.setAttribute(attr.name, attr.value)
-                    t_elem.parentNode.replaceChild(del_text, t_elem)
+                _rename_attribute(run, _W_RSID_R, _W_RSID_DEL, self.rsid)
+
+                # 原地重命名标签，文本、子节点和属性保持不变
+                for t_elem in run.findall(".//w:t", _NS):
+                    t_elem.tag = _W_DELTEXT
 
             # 将所有子元素从 ins 移动到 del 包装器
-            while ins_elem.firstChild:
-                del_wrapper.appendChild(ins_elem.firstChild)
+            del_wrapper.text = ins_elem.text
+            ins_elem.text = None
+            del_wrapper.extend(list(ins_elem))
 
             # 将 del 包装器添加回 ins
-            ins_elem.appendChild(del_wrapper)
+            ins_elem.append(del_wrapper)
 
             # 向删除包装器注入属性
-            self._inject_attributes_to_nodes([del_wrapper])
+            self._inject_attributes_to_nodes([del_wrapper], timestamp)
 
         return [elem]
 
@@ -366,18 +578,18 @@ class DocxXMLEditor(XMLEditor):
         """
         # 首先收集删除元素 - 在修改 DOM 之前
         del_elements = []
-        is_single_del = elem.tagName == "w:del"
+        is_single_del = elem.tag == _W_DEL
 
         if is_single_del:
             del_elements.append(elem)
         else:
-            del_elements.extend(elem.getElementsByTagName("w:del"))
+            del_elements.extend(elem.findall(".//w:del", _NS))
 
         # 验证是否有要拒绝的删除元素
         if not del_elements:
             raise ValueError(
                 f"revert_deletion requires w:del elements. "
-                f"The provided element <{elem.tagName}> contains no deletions. "
+                f"The provided element <{_tag_name(elem)}> contains no deletions. "
             )
 
         # 跟踪创建的插入元素（仅当 elem 是单个 w:del 时相关）
@@ -386,46 +598,39 @@ class DocxXMLEditor(XMLEditor):
         # 处理所有删除元素 - 创建复制已删除内容的插入元素
         for del_elem in del_elements:
             # 克隆已删除的运行并将它们转换为插入元素
-            runs = list(del_elem.getElementsByTagName("w:r"))
+            runs = del_elem.findall(".//w:r", _NS)
             if not runs:
                 continue
 
             # 创建插入包装器
-            ins_elem = self.dom.createElement("w:ins")
+            ins_elem = _make_element(_W_INS)
 
+            new_runs = []
             for run in runs:
                 # 克隆运行
-                new_run = run.cloneNode(True)
+                new_run = copy.deepcopy(run)
+                new_run.tail = None
 
                 # 转换 w:delText → w:t
-                for del_text in list(new_run.getElementsByTagName("w:delText")):
-                    t_elem = self.dom.createElement("w:t")
-                    # 复制所有子节点（不仅仅是 firstChild）以处理实体
-                    while del_text.firstChild:
-                        t_elem.appendChild(del_text.firstChild)
-                    for i in range(del_text.attributes.length):
-                        attr = del_text.attributes.item(i)
-                        t_elem.setAttribute(attr.name, attr.value)
-                    del_text.parentNode.replaceChild(t_elem, del_text)
+                for del_text in new_run.findall(".//w:delText", _NS):
+                    del_text.tag = _W_T
 
                 # 更新运行属性：w:rsidDel → w:rsidR
-                if new_run.hasAttribute("w:rsidDel"):
-                    new_run.setAttribute("w:rsidR", new_run.getAttribute("w:rsidDel"))
-                    new_run.removeAttribute("w:rsidDel")
-                elif not new_run.hasAttribute("w:rsidR"):
-                    new_run.setAttribute("w:rsidR", self.rsid)
+                _rename_attribute(new_run, _W_RSID_DEL, _W_RSID_R, self.rsid)
 
-                ins_elem.appendChild(new_run)
+                new_runs.append(new_run)
 
-            # 在删除之后插入新的插入元素
-            nodes = self.insert_after(del_elem, ins_elem.toxml())
+            ins_elem.extend(new_runs)
+
+            # 在删除之后直接接入新的插入元素，无需序列化再解析
+            self._insert_element_after(del_elem, ins_elem)
 
             # 如果处理单个 w:del，跟踪创建的插入元素
-            if is_single_del and nodes:
-                created_insertion = nodes[0]
+            if is_single_del:
+                created_insertion = ins_elem
 
         # 根据输入类型返回
-        if is_single_del and created_insertion:
+        if is_single_del and created_insertion is not None:
             return [elem, created_insertion]
         else:
             return [elem]
@@ -442,42 +647,37 @@ class DocxXMLEditor(XMLEditor):
         返回:
             str: 带有修订包装的转换后 XML
         """
-        wrapper = f'<root xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">{xml_content}</root>'
-        doc = minidom.parseString(wrapper)
-        para = doc.getElementsByTagName("w:p")[0]
+        # 常见情况直接在字符串上完成，无需解析再序列化
+        fast_result = _suggest_paragraph_fast(xml_content)
+        if fast_result is not None:
+            return fast_result
+
+        # 其他输入回退到解析 XML 处理
+        wrapper = f'<root xmlns:w="{WORD_NAMESPACE}">{xml_content}</root>'
+        root = lxml.etree.fromstring(wrapper, XML_PARSER)
+        para = next(root.iter(_W_P))
 
         # 确保 w:pPr 存在
-        pPr_list = para.getElementsByTagName("w:pPr")
-        if not pPr_list:
-            pPr = doc.createElement("w:pPr")
-            para.insertBefore(
-                pPr, para.firstChild
-            ) if para.firstChild else para.appendChild(pPr)
-        else:
-            pPr = pPr_list[0]
+        pPr = next(para.iter(_W_PPR), None)
+        if pPr is None:
+            pPr = _make_element(_W_PPR)
+            para.insert(0, pPr)
 
         # 确保 w:rPr 存在于 w:pPr 中
-        rPr_list = pPr.getElementsByTagName("w:rPr")
-        if not rPr_list:
-            rPr = doc.createElement("w:rPr")
-            pPr.appendChild(rPr)
-        else:
-            rPr = rPr_list[0]
+        rPr = next(pPr.iter(_W_RPR), None)
+        if rPr is None:
+            rPr = _make_element(_W_RPR)
+            pPr.append(rPr)
 
         # 将 <w:ins/> 添加到 w:rPr
-        ins_marker = doc.createElement("w:ins")
-        rPr.insertBefore(
-            ins_marker, rPr.firstChild
-        ) if rPr.firstChild else rPr.appendChild(ins_marker)
+        rPr.insert(0, _make_element(_W_INS))
 
         # Wrap all non-pPr children in <w:ins>
-        ins_wrapper = doc.createElement("w:ins")
-        for child in [c for c in para.childNodes if c.nodeName != "w:pPr"]:
-            para.removeChild(child)
-            ins_wrapper.appendChild(child)
-        para.appendChild(ins_wrapper)
+        ins_wrapper = _make_element(_W_INS)
+        ins_wrapper.extend([c for c in para if c.tag != _W_PPR])
+        para.append(ins_wrapper)
 
-        return para.toxml()
+        return lxml.etree.tostring(para, encoding="unicode")
 
     def suggest_deletion(self, elem):
         """Mark a w:r or w:p element as deleted with tracked changes (in-place DOM manipulation).
@@ -487,7 +687,7 @@ class DocxXMLEditor(XMLEditor):
         For w:p (numbered list): adds <w:del/> to w:rPr in w:pPr, wraps content in <w:del>
 
         Args:
-            elem: A w:r or w:p DOM element without existing tracked changes
+            elem: A w:r or w:p element without existing tracked changes
 
         Returns:
             Element: The modified element
@@ -495,94 +695,61 @@ class DocxXMLEditor(XMLEditor):
         Raises:
             ValueError: If element has existing tracked changes or invalid structure
         """
-        if elem.nodeName == "w:r":
+        if elem.tag == _W_R:
             # Check for existing w:delText
-            if elem.getElementsByTagName("w:delText"):
+            if next(elem.iter(_W_DELTEXT), None) is not None:
                 raise ValueError("w:r element already contains w:delText")
 
-            # Convert w:t → w:delText
-            for t_elem in list(elem.getElementsByTagName("w:t")):
-                del_text = self.dom.createElement("w:delText")
-                # Copy ALL child nodes (not just firstChild) to handle entities
-                while t_elem.firstChild:
-                    del_text.appendChild(t_elem.firstChild)
-                # Preserve attributes like xml:space
-                for i in range(t_elem.attributes.length):
-                    attr = t_elem.attributes.item(i)
-                    del_text.setAttribute(attr.name, attr.value)
-                t_elem.parentNode.replaceChild(del_text, t_elem)
+            # Convert w:t → w:delText by renaming (keeps text and xml:space)
+            for t_elem in elem.findall(".//w:t", _NS):
+                t_elem.tag = _W_DELTEXT
 
             # Update run attributes: w:rsidR → w:rsidDel
-            if elem.hasAttribute("w:rsidR"):
-                elem.setAttribute("w:rsidDel", elem.getAttribute("w:rsidR"))
-                elem.removeAttribute("w:rsidR")
-            elif not elem.hasAttribute("w:rsidDel"):
-                elem.setAttribute("w:rsidDel", self.rsid)
-
-            # Wrap in w:del
-            del_wrapper = self.dom.createElement("w:del")
-            parent = elem.parentNode
-            parent.insertBefore(del_wrapper, elem)
-            parent.removeChild(elem)
-            del_wrapper.appendChild(elem)
+            _rename_attribute(elem, _W_RSID_R, _W_RSID_DEL, self.rsid)
+
+            # Wrap in w:del (the run's tail stays outside the wrapper)
+            del_wrapper = _make_element(_W_DEL)
+            elem.addprevious(del_wrapper)
+            del_wrapper.tail = elem.tail
+            elem.tail = None
+            del_wrapper.append(elem)
 
             # Inject attributes to the deletion wrapper
             self._inject_attributes_to_nodes([del_wrapper])
 
             return del_wrapper
 
-        elif elem.nodeName == "w:p":
+        elif elem.tag == _W_P:
             # Check for existing tracked changes
-            if elem.getElementsByTagName("w:ins") or elem.getElementsByTagName("w:del"):
+            if next(elem.iterdescendants(_W_INS, _W_DEL), None) is not None:
                 raise ValueError("w:p element already contains tracked changes")
 
             # Check if it's a numbered list item
-            pPr_list = elem.getElementsByTagName("w:pPr")
-            is_numbered = pPr_list and pPr_list[0].getElementsByTagName("w:numPr")
+            pPr = next(elem.iter(_W_PPR), None)
+            is_numbered = pPr is not None and next(pPr.iter(_W_NUMPR), None) is not None
 
             if is_numbered:
                 # Add <w:del/> to w:rPr in w:pPr
-                pPr = pPr_list[0]
-                rPr_list = pPr.getElementsByTagName("w:rPr")
-
-                if not rPr_list:
-                    rPr = self.dom.createElement("w:rPr")
-                    pPr.appendChild(rPr)
-                else:
-                    rPr = rPr_list[0]
+                rPr = next(pPr.iter(_W_RPR), None)
+                if rPr is None:
+                    rPr = _make_element(_W_RPR)
+                    pPr.append(rPr)
 
                 # Add <w:del/> marker
-                del_marker = self.dom.createElement("w:del")
-                rPr.insertBefore(
-                    del_marker, rPr.firstChild
-                ) if rPr.firstChild else rPr.appendChild(del_marker)
-
-            # Convert w:t → w:delText in all runs
-            for t_elem in list(elem.getElementsByTagName("w:t")):
-                del_text = self.dom.createElement("w:delText")
-                # Copy ALL child nodes (not just firstChild) to handle entities
-                while t_elem.firstChild:
-                    del_text.appendChild(t_elem.firstChild)
-                # Preserve attributes like xml:space
-                for i in range(t_elem.attributes.length):
-                    attr = t_elem.attributes.item(i)
-                    del_text.setAttribute(attr.name, attr.value)
-                t_elem.parentNode.replaceChild(del_text, t_elem)
+                rPr.insert(0, _make_element(_W_DEL))
+
+            # Convert w:t → w:delText in all runs by renaming in place
+            for t_elem in elem.findall(".//w:t", _NS):
+                t_elem.tag = _W_DELTEXT
 
             # Update run attributes: w:rsidR → w:rsidDel
-            for run in elem.getElementsByTagName("w:r"):
-                if run.hasAttribute("w:rsidR"):
-                    run.setAttribute("w:rsidDel", run.getAttribute("w:rsidR"))
-                    run.removeAttribute("w:rsidR")
-                elif not run.hasAttribute("w:rsidDel"):
-                    run.setAttribute("w:rsidDel", self.rsid)
+            for run in elem.iter(_W_R):
+                _rename_attribute(run, _W_RSID_R, _W_RSID_DEL, self.rsid)
 
             # Wrap all non-pPr children in <w:del>
-            del_wrapper = self.dom.createElement("w:del")
-            for child in [c for c in elem.childNodes if c.nodeName != "w:pPr"]:
-                elem.removeChild(child)
-                del_wrapper.appendChild(child)
-            elem.appendChild(del_wrapper)
+            del_wrapper = _make_element(_W_DEL)
+            del_wrapper.extend([c for c in elem if c.tag != _W_PPR])
+            elem.append(del_wrapper)
 
             # Inject attributes to the deletion wrapper
             self._inject_attributes_to_nodes([del_wrapper])
@@ -590,7 +757,7 @@ class DocxXMLEditor(XMLEditor):
             return elem
 
         else:
-            raise ValueError(f"Element must be w:r or w:p, got {elem.nodeName}")
+            raise ValueError(f"Element must be w:r or w:p, got {_tag_name(elem)}")
 
 
 def _generate_hex_id() -> str:
@@ -599,14 +766,34 @@ def _generate_hex_id() -> str:
     Values are constrained to be less than 0x7FFFFFFF per OOXML spec:
     - paraId must be < 0x80000000
     - durableId must be < 0x7FFFFFFF
-    We use the stricter constraint (0x7FFFFFFF) for both.
+    We use the stricter constraint (0x7FFFFFFF) for both, i.e. 1..0x7FFFFFFE.
     """
-    return f"{random.randint(1, 0x7FFFFFFE):08X}"
+    value = int.from_bytes(os.urandom(4), "big") % 0x7FFFFFFE + 1
+    return f"{value:08X}"
 
 
 def _generate_rsid() -> str:
     """Generate random 8-character hex RSID."""
-    return "".join(random.choices("0123456789ABCDEF", k=8))
+    return os.urandom(4).hex().upper()
+
+
+def _copy_if_changed(src, dst):
+    """copytree helper that only copies parts the destination does not already have.
+
+    Parts staged with copy2 keep the source mtime, so a matching size and mtime
+    means nothing rewrote them since.
+    """
+    try:
+        dst_stat = os.stat(dst)
+    except FileNotFoundError:
+        return shutil.copy2(src, dst)
+    src_stat = os.stat(src)
+    if (
+        src_stat.st_size == dst_stat.st_size
+        and src_stat.st_mtime_ns == dst_stat.st_mtime_ns
+    ):
+        return dst
+    return shutil.copy2(src, dst)
 
 
 class Document:
@@ -636,14 +823,19 @@ class Document:
         if not self.original_path.exists() or not self.original_path.is_dir():
             raise ValueError(f"Directory not found: {unpacked_dir}")
 
-        # Create temporary directory with subdirectories for unpacked content and baseline
-        self.temp_dir = tempfile.mkdtemp(prefix="docx_")
+        # Create temporary directory with subdirectories for unpacked content and baseline.
+        # TemporaryDirectory also removes it at garbage collection or interpreter exit
+        # when the document is not used as a context manager.
+        self._tmp = tempfile.TemporaryDirectory(prefix="docx_")
+        self.temp_dir = self._tmp.name
         self.unpacked_path = Path(self.temp_dir) / "unpacked"
+        # Every part is a real copy, so callers may overwrite files under
+        # unpacked_path (e.g. word/media images) without touching the original.
         shutil.copytree(self.original_path, self.unpacked_path)
 
-        # Pack original directory into temporary .docx for validation baseline (outside unpacked dir)
-        self.original_docx = Path(self.temp_dir) / "original.docx"
-        pack_document(self.original_path, self.original_docx, validate=False)
+        # Validation baseline (outside unpacked dir), packed on first use by original_docx
+        self._original_docx_path = Path(self.temp_dir) / "original.docx"
+        self._original_docx_built = False
 
         self.word_path = self.unpacked_path / "word"
 
@@ -658,6 +850,13 @@ class Document:
         # Cache for lazy-loaded editors
         self._editors = {}
 
+        # (tag, w:id) -> comment anchor element in document.xml, built on first reply
+        self._comment_anchors = None
+
+        # Set once the comment parts are registered; nothing removes those entries
+        self._comment_rels_ensured = False
+        self._comment_ctypes_ensured = False
+
         # Comment file paths
         self.comments_path = self.word_path / "comments.xml"
         self.comments_extended_path = self.word_path / "commentsExtended.xml"
@@ -665,8 +864,7 @@ class Document:
         self.comments_extensible_path = self.word_path / "commentsExtensible.xml"
 
         # Load existing comments and determine next ID (before setup modifies files)
-        self.existing_comments = self._load_existing_comments()
-        self.next_comment_id = self._get_next_comment_id()
+        self.next_comment_id, self.existing_comments = self._scan_existing_comments()
 
         # Convenient access to document.xml editor (semi-private)
         self._document = self["word/document.xml"]
@@ -727,40 +925,47 @@ class Document:
             end_node = cm.get_document_node(tag="w:ins", id="2")
             cm.add_comment(start=start_node, end=end_node, text="Explanation")
         """
-        comment_id = self.next_comment_id
-        para_id = _generate_hex_id()
-        durable_id = _generate_hex_id()
-        timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
-
-        # Add comment ranges to document.xml immediately
-        self._document.insert_before(start, self._comment_range_start_xml(comment_id))
+        return self.add_comments([(start, end, text)])[0]
 
-        # If end node is a paragraph, append comment markup inside it
-        # Otherwise insert after it (for run-level anchors)
-        if end.tagName == "w:p":
-            self._document.append_to(end, self._comment_range_end_xml(comment_id))
-        else:
-            self._document.insert_after(end, self._comment_range_end_xml(comment_id))
+    def add_comments(self, comments) -> list:
+        """
+        Add several comments, updating each comment part once for the whole batch.
 
-        # Add to comments.xml immediately
-        self._add_to_comments_xml(
-            comment_id, para_id, text, self.author, self.initials, timestamp
-        )
+        Args:
+            comments: Iterable of (start, end, text) tuples, as for add_comment()
 
-        # Add to commentsExtended.xml immediately
-        self._add_to_comments_extended_xml(para_id, parent_para_id=None)
+        Returns:
+            The comment IDs that were created, in order
 
-        # Add to commentsIds.xml immediately
-        self._add_to_comments_ids_xml(para_id, durable_id)
+        Example:
+            cm.add_comments([(para1, para1, "First"), (para2, para2, "Second")])
+        """
+        timestamp = _utc_timestamp()
+        entries = []
+        for start, end, text in comments:
+            comment_id = self.next_comment_id
+            self.next_comment_id += 1
+
+            # Add comment ranges to document.xml immediately
+            start_nodes = self._document._insert_elements(
+                start, self._comment_range_start(comment_id), "before"
+            )
 
-        # Add to commentsExtensible.xml immediately
-        self._add_to_comments_extensible_xml(durable_id)
+            # If end node is a paragraph, append comment markup inside it
+            # Otherwise insert after it (for run-level anchors)
+            end_nodes = self._document._insert_elements(
+                end,
+                self._comment_range_end(comment_id),
+                "append" if end.tag == _W_P else "after",
+            )
+            self._index_comment_anchors(start_nodes + end_nodes)
 
-        # Update existing_comments so replies work
-        self.existing_comments[comment_id] = {"para_id": para_id}
+            entries.append(
+                (comment_id, _generate_hex_id(), _generate_hex_id(), text, None)
+            )
 
-        self.next_comment_id += 1
-        return comment_id
+        self._add_comment_entries(entries, timestamp)
+        return [entry[0] for entry in entries]
 
     def reply_to_comment(
         self,
@@ -787,53 +992,58 @@ class Document:
         comment_id = self.next_comment_id
         para_id = _generate_hex_id()
         durable_id = _generate_hex_id()
-        timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        timestamp = _utc_timestamp()
 
         # Add comment ranges to document.xml immediately
-        parent_start_elem = self._document.get_node(
-            tag="w:commentRangeStart", attrs={"w:id": str(parent_comment_id)}
+        parent_start_elem = self._get_comment_anchor(
+            "w:commentRangeStart", parent_comment_id
         )
-        parent_ref_elem = self._document.get_node(
-            tag="w:commentReference", attrs={"w:id": str(parent_comment_id)}
+        parent_ref_elem = self._get_comment_anchor(
+            "w:commentReference", parent_comment_id
         )
 
-        self._document.insert_after(
-            parent_start_elem, self._comment_range_start_xml(comment_id)
+        start_nodes = self._document._insert_elements(
+            parent_start_elem, self._comment_range_start(comment_id), "after"
         )
-        parent_ref_run = parent_ref_elem.parentNode
-        self._document.insert_after(
-            parent_ref_run, f'<w:commentRangeEnd w:id="{comment_id}"/>'
-        )
-        self._document.insert_after(
-            parent_ref_run, self._comment_ref_run_xml(comment_id)
-        )
-
-        # Add to comments.xml immediately
-        self._add_to_comments_xml(
-            comment_id, para_id, text, self.author, self.initials, timestamp
+        # The reply's reference run, then its range end, follow the parent's reference run
+        ref_nodes = self._document._insert_elements(
+            parent_ref_elem.getparent(),
+            [
+                _make_comment_ref_run(comment_id),
+                _make_comment_marker(_W_COMMENT_RANGE_END, comment_id),
+            ],
+            "after",
         )
+        self._index_comment_anchors(start_nodes + ref_nodes)
 
-        # Add to commentsExtended.xml immediately (with parent)
-        self._add_to_comments_extended_xml(
-            para_id, parent_para_id=parent_info["para_id"]
+        self.next_comment_id += 1
+        self._add_comment_entries(
+            [(comment_id, para_id, durable_id, text, parent_info["para_id"])],
+            timestamp,
         )
+        return comment_id
 
-        # Add to commentsIds.xml immediately
-        self._add_to_comments_ids_xml(para_id, durable_id)
+    def close(self) -> None:
+        """Remove the temporary directory. Call save() first to keep changes."""
+        # Drop validation results cached for parts of the temp copy
+        evict_cached_results(self.temp_dir)
+        self._tmp.cleanup()
 
-        # Add to commentsExtensible.xml immediately
-        self._add_to_comments_extensible_xml(durable_id)
+    def __enter__(self):
+        return self
 
-        # Update existing_comments so replies work
-        self.existing_comments[comment_id] = {"para_id": para_id}
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
-        self.next_comment_id += 1
-        return comment_id
+    @property
+    def original_docx(self) -> Path:
+        """Path to the packed original document used as the validation baseline.
 
-    def __del__(self):
-        """Clean up temporary directory on deletion."""
-        if hasattr(self, "temp_dir") and Path(self.temp_dir).exists():
-            shutil.rmtree(self.temp_dir)
+        Packing is deferred until a validator needs it, so edit-and-save flows
+        that skip validation never zip the original directory.
+        """
+        self._pack_original()
+        return self._original_docx_path
 
     def validate(self) -> None:
         """
@@ -842,7 +1052,8 @@ class Document:
         Raises:
             ValueError: If validation fails.
         """
-        # Create validators with current state
+        # Validators are cheap to build; per-part XSD results are cached by
+        # file state, so parts unchanged since the last validate() are skipped
         schema_validator = DOCXSchemaValidator(
             self.unpacked_path, self.original_docx, verbose=False
         )
@@ -879,54 +1090,98 @@ class Document:
         if validate:
             self.validate()
 
-        # Copy contents from temp directory to destination (or original directory)
+        # Copy changed parts from temp directory to destination (or original directory)
         target_path = Path(destination) if destination else self.original_path
-        shutil.copytree(self.unpacked_path, target_path, dirs_exist_ok=True)
+        if target_path.resolve() == self.original_path.resolve():
+            # The baseline must be packed before the original files are overwritten
+            self._pack_original()
+        shutil.copytree(
+            self.unpacked_path,
+            target_path,
+            copy_function=_copy_if_changed,
+            dirs_exist_ok=True,
+        )
+
+    def to_bytes(self, validate=True) -> bytes:
+        """
+        Pack the edited document into .docx bytes without touching the original directory.
+
+        Edited parts are serialized straight from their editors into an in-memory
+        ZIP, so no destination copy or intermediate pack directory is written.
+        The XML is condensed the same way ooxml/scripts/pack.py does it.
+
+        Args:
+            validate: If True, validates document before packing (default: True).
+
+        Returns:
+            The packed .docx file contents.
+        """
+        if self.comments_path.exists():
+            self._ensure_comment_relationships()
+            self._ensure_comment_content_types()
+
+        # Validators read the unpacked directory, so edits must be on disk first
+        if validate:
+            for editor in self._editors.values():
+                editor.save()
+            self.validate()
+
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+            for f in self.unpacked_path.rglob("*"):
+                if not f.is_file():
+                    continue
+                arcname = f.relative_to(self.unpacked_path).as_posix()
+                editor = self._editors.get(arcname)
+                if editor is not None:
+                    zf.writestr(arcname, condense_xml_bytes(editor.to_bytes()))
+                elif f.name.endswith((".xml", ".rels")):
+                    zf.writestr(arcname, condense_xml_bytes(f.read_bytes()))
+                else:
+                    zf.write(f, arcname)
+        return buffer.getvalue()
 
     # ==================== Private: Initialization ====================
 
-    def _get_next_comment_id(self):
-        """Get the next available comment ID."""
-        if not self.comments_path.exists():
-            return 0
+    def _pack_original(self):
+        """Pack the original directory into the validation baseline (once)."""
+        if not self._original_docx_built:
+            pack_document(self.original_path, self._original_docx_path, validate=False)
+            self._original_docx_built = True
 
-        editor = self["word/comments.xml"]
-        max_id = -1
-        for comment_elem in editor.dom.getElementsByTagName("w:comment"):
-            comment_id = comment_elem.getAttribute("w:id")
-            if comment_id:
-                try:
-                    max_id = max(max_id, int(comment_id))
-                except ValueError:
-                    pass
-        return max_id + 1
+    def _scan_existing_comments(self):
+        """Get the next available comment ID and load existing comments to enable replies.
+
+        Both come from a single pass over word/comments.xml.
 
-    def _load_existing_comments(self):
-        """Load existing comments from files to enable replies."""
+        Returns:
+            Tuple of (next comment ID, {comment ID: {"para_id": ...}})
+        """
         if not self.comments_path.exists():
-            return {}
+            return 0, {}
 
         editor = self["word/comments.xml"]
+        max_id = -1
         existing = {}
 
-        for comment_elem in editor.dom.getElementsByTagName("w:comment"):
-            comment_id = comment_elem.getAttribute("w:id")
-            if not comment_id:
+        for comment_elem in editor.iter_tag("w:comment"):
+            try:
+                comment_id = int(comment_elem.get(_W_ID))
+            except (TypeError, ValueError):
                 continue
+            max_id = max(max_id, comment_id)
 
             # Find para_id from the w:p element within the comment
             para_id = None
-            for p_elem in comment_elem.getElementsByTagName("w:p"):
-                para_id = p_elem.getAttribute("w14:paraId")
+            for p_elem in comment_elem.iter(_W_P):
+                para_id = p_elem.get(_W14_PARA_ID)
                 if para_id:
                     break
 
-            if not para_id:
-                continue
-
-            existing[int(comment_id)] = {"para_id": para_id}
+            if para_id:
+                existing[comment_id] = {"para_id": para_id}
 
-        return existing
+        return max_id + 1, existing
 
     # ==================== Private: Setup Methods ====================
 
@@ -965,9 +1220,13 @@ class Document:
             return
 
         # Add Override element
-        root = editor.dom.documentElement
-        override_xml = '<Override PartName="/word/people.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.people+xml"/>'
-        editor.append_to(root, override_xml)
+        root = editor.dom.getroot()
+        SubElement(
+            root,
+            _child_tag(root, "Override"),
+            PartName="/word/people.xml",
+            ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.people+xml",
+        )
 
     def _add_relationship_for_people(self, path):
         """Add people.xml relationship to document.xml.rels if not already present."""
@@ -976,14 +1235,17 @@ class Document:
         if self._has_relationship(editor, "people.xml"):
             return
 
-        root = editor.dom.documentElement
-        root_tag = root.tagName  # type: ignore
-        prefix = root_tag.split(":")[0] + ":" if ":" in root_tag else ""
+        root = editor.dom.getroot()
         next_rid = editor.get_next_rid()
 
         # Create the relationship entry
-        rel_xml = f'<{prefix}Relationship Id="{next_rid}" Type="http://schemas.microsoft.com/office/2011/relationships/people" Target="people.xml"/>'
-        editor.append_to(root, rel_xml)
+        SubElement(
+            root,
+            _child_tag(root, "Relationship"),
+            Id=next_rid,
+            Type="http://schemas.microsoft.com/office/2011/relationships/people",
+            Target="people.xml",
+        )
 
     def _update_settings(self, path, track_revisions=False):
         """Add RSID and optionally enable track revisions in settings.xml.
@@ -997,184 +1259,221 @@ class Document:
         - rsids: late (after compat)
         """
         editor = self["word/settings.xml"]
-        root = editor.get_node(tag="w:settings")
-        prefix = root.tagName.split(":")[0] if ":" in root.tagName else "w"
+        root = editor.dom.getroot()
+        prefix = root.prefix or "w"
 
-        # Conditionally add trackRevisions if requested
-        if track_revisions:
-            track_revisions_exists = any(
-                elem.tagName == f"{prefix}:trackRevisions"
-                for elem in editor.dom.getElementsByTagName(f"{prefix}:trackRevisions")
-            )
+        # Every element looked up here is a direct child of w:settings, so a
+        # single pass over the children replaces one full-tree walk per tag
+        children = {}
+        for child in root:
+            children.setdefault(child.tag, child)
 
-            if not track_revisions_exists:
-                track_rev_xml = f"<{prefix}:trackRevisions/>"
-                # Try to insert before documentProtection, defaultTabStop, or at start
-                inserted = False
-                for tag in [f"{prefix}:documentProtection", f"{prefix}:defaultTabStop"]:
-                    elements = editor.dom.getElementsByTagName(tag)
-                    if elements:
-                        editor.insert_before(elements[0], track_rev_xml)
-                        inserted = True
-                        break
-                if not inserted:
-                    # Insert as first child of settings
-                    if root.firstChild:
-                        editor.insert_before(root.firstChild, track_rev_xml)
-                    else:
-                        editor.append_to(root, track_rev_xml)
+        # Conditionally add trackRevisions if requested
+        if track_revisions and _W_TRACK_REVISIONS not in children:
+            track_rev_xml = f"<{prefix}:trackRevisions/>"
+            # Insert before documentProtection, defaultTabStop, or at start
+            anchor = children.get(_W_DOCUMENT_PROTECTION)
+            if anchor is None:
+                anchor = children.get(_W_DEFAULT_TAB_STOP)
+            if anchor is not None:
+                editor.insert_before(anchor, track_rev_xml)
+            elif len(root):
+                # Insert as first child of settings
+                editor.insert_before(root[0], track_rev_xml)
+            else:
+                editor.append_to(root, track_rev_xml)
 
         # Always check if rsids section exists
-        rsids_elements = editor.dom.getElementsByTagName(f"{prefix}:rsids")
+        rsids_elem = children.get(_W_RSIDS)
 
-        if not rsids_elements:
+        if rsids_elem is None:
             # Add new rsids section
             rsids_xml = f'''<{prefix}:rsids>
   <{prefix}:rsidRoot {prefix}:val="{self.rsid}"/>
   <{prefix}:rsid {prefix}:val="{self.rsid}"/>
 </{prefix}:rsids>'''
 
-            # Try to insert after compat, before clrSchemeMapping, or before closing tag
-            inserted = False
-            compat_elements = editor.dom.getElementsByTagName(f"{prefix}:compat")
-            if compat_elements:
-                editor.insert_after(compat_elements[0], rsids_xml)
-                inserted = True
-
-            if not inserted:
-                clr_elements = editor.dom.getElementsByTagName(
-                    f"{prefix}:clrSchemeMapping"
-                )
-                if clr_elements:
-                    editor.insert_before(clr_elements[0], rsids_xml)
-                    inserted = True
-
-            if not inserted:
+            # Insert after compat, before clrSchemeMapping, or before closing tag
+            compat = children.get(_W_COMPAT)
+            clr_scheme_mapping = children.get(_W_CLR_SCHEME_MAPPING)
+            if compat is not None:
+                editor.insert_after(compat, rsids_xml)
+            elif clr_scheme_mapping is not None:
+                editor.insert_before(clr_scheme_mapping, rsids_xml)
+            else:
                 editor.append_to(root, rsids_xml)
         else:
             # Check if this rsid already exists
-            rsids_elem = rsids_elements[0]
-            rsid_exists = any(
-                elem.getAttribute(f"{prefix}:val") == self.rsid
-                for elem in rsids_elem.getElementsByTagName(f"{prefix}:rsid")
-            )
-
-            if not rsid_exists:
+            rsids = {elem.get(_W_VAL) for elem in rsids_elem.iter(_W_RSID)}
+            if self.rsid not in rsids:
                 rsid_xml = f'<{prefix}:rsid {prefix}:val="{self.rsid}"/>'
                 editor.append_to(rsids_elem, rsid_xml)
 
     # ==================== Private: XML File Creation ====================
 
-    def _add_to_comments_xml(
-        self, comment_id, para_id, text, author, initials, timestamp
-    ):
-        """Add a single comment to comments.xml."""
+    def _add_comment_entries(self, entries, timestamp):
+        """Add comments to the four comment parts, one pass per part.
+
+        Args:
+            entries: List of (comment_id, para_id, durable_id, text, parent_para_id)
+            timestamp: Timestamp shared by every comment in the batch
+        """
+        if not entries:
+            return
+
+        self._add_to_comments_xml(entries, timestamp)
+        self._add_to_comments_extended_xml(entries)
+        self._add_to_comments_ids_xml(entries)
+        self._add_to_comments_extensible_xml(entries)
+
+        # Update existing_comments so replies work
+        for comment_id, para_id, *_ in entries:
+            self.existing_comments[comment_id] = {"para_id": para_id}
+
+    def _add_to_comments_xml(self, entries, timestamp):
+        """Add comments to comments.xml."""
         if not self.comments_path.exists():
             shutil.copy(TEMPLATE_DIR / "comments.xml", self.comments_path)
 
         editor = self["word/comments.xml"]
-        root = editor.get_node(tag="w:comments")
+        root = editor.dom.getroot()
 
-        escaped_text = (
-            text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
-        )
+        # Built directly as elements; the text is escaped by lxml on save.
         # Note: w:rsidR, w:rsidRDefault, w:rsidP on w:p, w:rsidR on w:r,
-        # and w:author, w:date, w:initials on w:comment are automatically added by DocxXMLEditor
-        comment_xml = f'''<w:comment w:id="{comment_id}">
-  <w:p w14:paraId="{para_id}" w14:textId="77777777">
-    <w:r><w:rPr><w:rStyle w:val="CommentReference"/></w:rPr><w:annotationRef/></w:r>
-    <w:r><w:rPr><w:color w:val="000000"/><w:sz w:val="20"/><w:szCs w:val="20"/></w:rPr><w:t>{escaped_text}</w:t></w:r>
-  </w:p>
-</w:comment>'''
-        editor.append_to(root, comment_xml)
-
-    def _add_to_comments_extended_xml(self, para_id, parent_para_id):
-        """Add a single comment to commentsExtended.xml."""
+        # and w:author, w:date, w:initials on w:comment are added by DocxXMLEditor
+        comments = []
+        for comment_id, para_id, _, text, _ in entries:
+            comment = SubElement(root, _W_COMMENT, {_W_ID: str(comment_id)})
+            para = SubElement(
+                comment, _W_P, {_W14_PARA_ID: para_id, _W14_TEXT_ID: "77777777"}
+            )
+            ref_run = SubElement(para, _W_R)
+            SubElement(
+                SubElement(ref_run, _W_RPR),
+                f"{_W}rStyle",
+                {_W_VAL: "CommentReference"},
+            )
+            SubElement(ref_run, f"{_W}annotationRef")
+            text_run = SubElement(para, _W_R)
+            text_rpr = SubElement(text_run, _W_RPR)
+            SubElement(text_rpr, f"{_W}color", {_W_VAL: "000000"})
+            SubElement(text_rpr, f"{_W}sz", {_W_VAL: "20"})
+            SubElement(text_rpr, f"{_W}szCs", {_W_VAL: "20"})
+            SubElement(text_run, _W_T).text = text
+            comments.append(comment)
+        editor._inject_attributes_to_nodes(comments, timestamp)
+
+    def _add_to_comments_extended_xml(self, entries):
+        """Add comments to commentsExtended.xml."""
         if not self.comments_extended_path.exists():
             shutil.copy(
                 TEMPLATE_DIR / "commentsExtended.xml", self.comments_extended_path
             )
 
-        editor = self["word/commentsExtended.xml"]
-        root = editor.get_node(tag="w15:commentsEx")
-
-        if parent_para_id:
-            xml = f'<w15:commentEx w15:paraId="{para_id}" w15:paraIdParent="{parent_para_id}" w15:done="0"/>'
-        else:
-            xml = f'<w15:commentEx w15:paraId="{para_id}" w15:done="0"/>'
-        editor.append_to(root, xml)
+        root = self["word/commentsExtended.xml"].dom.getroot()
+        for _, para_id, _, _, parent_para_id in entries:
+            attrib = {f"{_W15}paraId": para_id}
+            if parent_para_id:
+                attrib[f"{_W15}paraIdParent"] = parent_para_id
+            attrib[f"{_W15}done"] = "0"
+            SubElement(root, f"{_W15}commentEx", attrib)
 
-    def _add_to_comments_ids_xml(self, para_id, durable_id):
-        """Add a single comment to commentsIds.xml."""
+    def _add_to_comments_ids_xml(self, entries):
+        """Add comments to commentsIds.xml."""
         if not self.comments_ids_path.exists():
             shutil.copy(TEMPLATE_DIR / "commentsIds.xml", self.comments_ids_path)
 
-        editor = self["word/commentsIds.xml"]
-        root = editor.get_node(tag="w16cid:commentsIds")
-
-        xml = f'<w16cid:commentId w16cid:paraId="{para_id}" w16cid:durableId="{durable_id}"/>'
-        editor.append_to(root, xml)
+        root = self["word/commentsIds.xml"].dom.getroot()
+        for _, para_id, durable_id, _, _ in entries:
+            SubElement(
+                root,
+                f"{_W16CID}commentId",
+                {f"{_W16CID}paraId": para_id, f"{_W16CID}durableId": durable_id},
+            )
 
-    def _add_to_comments_extensible_xml(self, durable_id):
-        """Add a single comment to commentsExtensible.xml."""
+    def _add_to_comments_extensible_xml(self, entries):
+        """Add comments to commentsExtensible.xml."""
         if not self.comments_extensible_path.exists():
             shutil.copy(
                 TEMPLATE_DIR / "commentsExtensible.xml", self.comments_extensible_path
             )
 
         editor = self["word/commentsExtensible.xml"]
-        root = editor.get_node(tag="w16cex:commentsExtensible")
+        root = editor.dom.getroot()
+        extensibles = [
+            SubElement(
+                root, _W16CEX_COMMENT_EXTENSIBLE, {f"{_W16CEX}durableId": durable_id}
+            )
+            for _, _, durable_id, _, _ in entries
+        ]
+        # Adds w16cex:dateUtc
+        editor._inject_attributes_to_nodes(extensibles)
 
-        xml = f'<w16cex:commentExtensible w16cex:durableId="{durable_id}"/>'
-        editor.append_to(root, xml)
+    # ==================== Private: Comment Anchors ====================
 
-    # ==================== Private: XML Fragments ====================
+    def _get_comment_anchor(self, tag, comment_id):
+        """Find a comment's w:commentRangeStart/w:commentReference in document.xml.
 
-    def _comment_range_start_xml(self, comment_id):
-        """Generate XML for comment range start."""
-        return f'<w:commentRangeStart w:id="{comment_id}"/>'
+        The first lookup indexes every anchor in one pass; later lookups are dict
+        hits. Anchors removed by later edits fall back to a full get_node search.
+        """
+        root = self._document.dom.getroot()
+        if self._comment_anchors is None:
+            self._comment_anchors = {}
+            self._index_comment_anchors([root])
+
+        key = (self._document.qname(tag), str(comment_id))
+        elem = self._comment_anchors.get(key)
+        if elem is None or elem.getroottree().getroot() is not root:
+            elem = self._document.get_node(tag=tag, attrs={"w:id": str(comment_id)})
+            self._comment_anchors[key] = elem
+        return elem
+
+    def _index_comment_anchors(self, nodes):
+        """Add comment anchors within nodes to the index (no-op until it is built)."""
+        if self._comment_anchors is None:
+            return
+        for node in nodes:
+            for elem in node.iter(_W_COMMENT_RANGE_START, _W_COMMENT_REFERENCE):
+                self._comment_anchors.setdefault((elem.tag, elem.get(_W_ID)), elem)
 
-    def _comment_range_end_xml(self, comment_id):
-        """Generate XML for comment range end with reference run.
+    # ==================== Private: Comment Markup ====================
 
-        Note: w:rsidR is automatically added by DocxXMLEditor.
-        """
-        return f'''<w:commentRangeEnd w:id="{comment_id}"/>
-<w:r>
-  <w:rPr><w:rStyle w:val="CommentReference"/></w:rPr>
-  <w:commentReference w:id="{comment_id}"/>
-</w:r>'''
+    def _comment_range_start(self, comment_id):
+        """Build the comment range start element."""
+        return [_make_comment_marker(_W_COMMENT_RANGE_START, comment_id)]
 
-    def _comment_ref_run_xml(self, comment_id):
-        """Generate XML for comment reference run.
+    def _comment_range_end(self, comment_id):
+        """Build the comment range end followed by its reference run.
 
         Note: w:rsidR is automatically added by DocxXMLEditor.
         """
-        return f'''<w:r>
-  <w:rPr><w:rStyle w:val="CommentReference"/></w:rPr>
-  <w:commentReference w:id="{comment_id}"/>
-</w:r>'''
+        return [
+            _make_comment_marker(_W_COMMENT_RANGE_END, comment_id),
+            _make_comment_ref_run(comment_id),
+        ]
 
     # ==================== Private: Metadata Updates ====================
 
     def _has_relationship(self, editor, target):
         """Check if a relationship with given target exists."""
-        for rel_elem in editor.dom.getElementsByTagName("Relationship"):
-            if rel_elem.getAttribute("Target") == target:
+        for rel_elem in editor.iter_tag("Relationship"):
+            if rel_elem.get("Target") == target:
                 return True
         return False
 
     def _has_override(self, editor, part_name):
         """Check if an override with given part name exists."""
-        for override_elem in editor.dom.getElementsByTagName("Override"):
-            if override_elem.getAttribute("PartName") == part_name:
+        for override_elem in editor.iter_tag("Override"):
+            if override_elem.get("PartName") == part_name:
                 return True
         return False
 
     def _has_author(self, editor, author):
         """Check if an author already exists in people.xml."""
-        for person_elem in editor.dom.getElementsByTagName("w15:person"):
-            if person_elem.getAttribute("w15:author") == author:
+        author_attr = editor.qname("w15:author", attribute=True)
+        for person_elem in editor.iter_tag("w15:person"):
+            if person_elem.get(author_attr) == author:
                 return True
         return False
 
@@ -1187,29 +1486,34 @@ class Document:
             raise ValueError("people.xml should exist after _setup_tracking")
 
         editor = self["word/people.xml"]
-        root = editor.get_node(tag="w15:people")
 
         # Check if author already exists
         if self._has_author(editor, author):
             return
 
-        # Add author with proper XML escaping to prevent injection
-        escaped_author = html.escape(author, quote=True)
-        person_xml = f'''<w15:person w15:author="{escaped_author}">
-  <w15:presenceInfo w15:providerId="None" w15:userId="{escaped_author}"/>
-</w15:person>'''
-        editor.append_to(root, person_xml)
+        # Attribute values are escaped by lxml on save
+        person = SubElement(
+            editor.dom.getroot(), f"{_W15}person", {f"{_W15}author": author}
+        )
+        SubElement(
+            person,
+            f"{_W15}presenceInfo",
+            {f"{_W15}providerId": "None", f"{_W15}userId": author},
+        )
 
     def _ensure_comment_relationships(self):
         """Ensure word/_rels/document.xml.rels has comment relationships."""
+        if self._comment_rels_ensured:
+            return
+        self._comment_rels_ensured = True
+
         editor = self["word/_rels/document.xml.rels"]
 
         if self._has_relationship(editor, "comments.xml"):
             return
 
-        root = editor.dom.documentElement
-        root_tag = root.tagName  # type: ignore
-        prefix = root_tag.split(":")[0] + ":" if ":" in root_tag else ""
+        root = editor.dom.getroot()
+        rel_tag = _child_tag(root, "Relationship")
         next_rid_num = int(editor.get_next_rid()[3:])
 
         # Add relationship elements
@@ -1237,17 +1541,20 @@ class Document:
         ]
 
         for rel_id, rel_type, target in rels:
-            rel_xml = f'<{prefix}Relationship Id="rId{rel_id}" Type="{rel_type}" Target="{target}"/>'
-            editor.append_to(root, rel_xml)
+            SubElement(root, rel_tag, Id=f"rId{rel_id}", Type=rel_type, Target=target)
 
     def _ensure_comment_content_types(self):
         """Ensure [Content_Types].xml has comment content types."""
+        if self._comment_ctypes_ensured:
+            return
+        self._comment_ctypes_ensured = True
+
         editor = self["[Content_Types].xml"]
 
         if self._has_override(editor, "/word/comments.xml"):
             return
 
-        root = editor.dom.documentElement
+        root = editor.dom.getroot()
 
         # Add Override elements
         overrides = [
@@ -1269,8 +1576,6 @@ class Document:
             ),
         ]
 
+        override_tag = _child_tag(root, "Override")
         for part_name, content_type in overrides:
-            override_xml = (
-                f'<Override PartName="{part_name}" ContentType="{content_type}"/>'
-            )
-            editor.append_to(root, override_xml)
+            SubElement(root, override_tag, PartName=part_name, ContentType=content_type)
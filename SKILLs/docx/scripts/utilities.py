@@ -3,7 +3,7 @@
 OOXML 文档编辑工具集。
 
 本模块提供 XMLEditor 类，用于操作 XML 文件，支持基于行号的节点查找和 DOM 操作。
-在解析过程中，每个元素都会自动标注其原始行号和列位置。
+底层使用 lxml.etree，每个元素的原始行号可通过 sourceline 获取。
 
 使用示例：
     editor = XMLEditor("document.xml")
@@ -30,24 +30,40 @@ OOXML 文档编辑工具集。
 """
 
 import html
+import os
 from pathlib import Path
 from typing import Optional, Union
 
-import defusedxml.minidom
-import defusedxml.sax
+import lxml.etree
+
+XML_NAMESPACE = "http://www.w3.org/XML/1998/namespace"
+
+# 不展开实体、不加载 DTD、不访问网络，与 defusedxml 提供的防护等价；huge_tree 解除
+# libxml2 对超大文档的深度/长度限制，行号直接取自 libxml2 记录的 sourceline。
+# OOXML 部件不使用 xml:id 查找（批注按 w:id 自行索引），因此关闭 ID 表收集
+XML_PARSER = lxml.etree.XMLParser(
+    resolve_entities=False,
+    load_dtd=False,
+    no_network=True,
+    huge_tree=True,
+    collect_ids=False,
+)
 
 
 class XMLEditor:
     """
     用于操作 OOXML XML 文件的编辑器，支持基于行号的节点查找。
 
-    该类解析 XML 文件并跟踪每个元素的原始行号和列位置。
+    该类解析 XML 文件并跟踪每个元素的原始行号。
     这使得可以根据原始文件中的行号查找节点，在使用 Read 工具输出时非常有用。
 
+    标签和属性名称使用与文件中相同的前缀形式（例如 "w:p"、"w:id"），
+    前缀按根元素上的命名空间声明解析。
+
     属性：
         xml_path: 正在编辑的 XML 文件路径
         encoding: 检测到的 XML 文件编码（'ascii' 或 'utf-8'）
-        dom: 解析后的 DOM 树，元素上带有 parse_position 属性
+        dom: 解析后的 lxml.etree.ElementTree，元素的 sourceline 为原始行号
     """
 
     def __init__(self, xml_path):
@@ -68,8 +84,53 @@ class XMLEditor:
             header = f.read(200).decode("utf-8", errors="ignore")
         self.encoding = "ascii" if 'encoding="ascii"' in header else "utf-8"
 
-        parser = _create_line_tracking_parser()
-        self.dom = defusedxml.minidom.parse(str(self.xml_path), parser)
+        self.dom = lxml.etree.parse(str(self.xml_path), XML_PARSER)
+        self._nsmap = self.dom.getroot().nsmap
+
+    def qname(self, name: str, attribute: bool = False, elem=None) -> str:
+        """
+        将带前缀的名称（例如 "w:p"）转换为 lxml 使用的 "{uri}local" 形式。
+
+        参数：
+            name: 带前缀或不带前缀的标签/属性名称
+            attribute: 是否为属性名（不带前缀的属性不属于任何命名空间）
+            elem: 可选，前缀未在根元素上声明时用于解析前缀的元素
+
+        返回：
+            str: Clark 表示法的限定名称
+
+        异常：
+            ValueError: 如果前缀未声明
+        """
+        prefix, _, local = name.rpartition(":")
+        if prefix == "xml":
+            return f"{{{XML_NAMESPACE}}}{local}"
+        if prefix:
+            uri = self._nsmap.get(prefix)
+            if uri is None and elem is not None:
+                uri = elem.nsmap.get(prefix)
+            if uri is None:
+                raise ValueError(f"未声明的命名空间前缀: {prefix}")
+        elif attribute:
+            return local
+        else:
+            uri = self._nsmap.get(None)
+            if uri is None:
+                return local
+        return f"{{{uri}}}{local}"
+
+    def iter_tag(self, tag: str, elem=None):
+        """
+        按带前缀的标签名遍历元素（包括 elem 自身），默认从根元素开始。
+
+        前缀只在局部声明（未出现在根元素上）时，按前缀和本地名匹配。
+        """
+        if elem is None:
+            elem = self.dom.getroot()
+        prefix, _, local = tag.rpartition(":")
+        if prefix and prefix != "xml" and prefix not in self._nsmap:
+            return (e for e in elem.iter(f"{{*}}{local}") if e.prefix == prefix)
+        return elem.iter(self.qname(tag))
 
     def get_node(
         self,
@@ -92,7 +153,7 @@ class XMLEditor:
                       支持实体表示法（&#8220;）和 Unicode 字符（\u201c）。
 
         返回：
-            defusedxml.minidom.Element: 匹配的 DOM 元素
+            lxml.etree._Element: 匹配的元素
 
         异常：
             ValueError: 如果未找到节点或找到多个匹配项
@@ -108,11 +169,11 @@ class XMLEditor:
             elem = editor.get_node(tag="w:t", contains="\u201c协议")   # Unicode 字符
         """
         matches = []
-        for elem in self.dom.getElementsByTagName(tag):
+        for elem in self.iter_tag(tag):
             # 检查行号过滤器
             if line_number is not None:
-                parse_pos = getattr(elem, "parse_position", (None,))
-                elem_line = parse_pos[0]
+                # 新插入的节点没有原始行号（sourceline 为 None）
+                elem_line = elem.sourceline
 
                 # 同时处理单个行号和行号范围
                 if isinstance(line_number, range):
@@ -125,7 +186,7 @@ class XMLEditor:
             # 检查属性过滤器
             if attrs is not None:
                 if not all(
-                    elem.getAttribute(attr_name) == attr_value
+                    self._get_attribute(elem, attr_name) == attr_value
                     for attr_name, attr_value in attrs.items()
                 ):
                     continue
@@ -178,6 +239,13 @@ class XMLEditor:
             )
         return matches[0]
 
+    def _get_attribute(self, elem, name):
+        """读取带前缀名称的属性值，不存在（或前缀在此处未声明）时返回空字符串。"""
+        try:
+            return elem.get(self.qname(name, attribute=True, elem=elem), "")
+        except ValueError:
+            return ""
+
     def _get_element_text(self, elem):
         """
         递归提取元素中的所有文本内容。
@@ -186,40 +254,36 @@ class XMLEditor:
         这些通常代表 XML 格式而非文档内容。
 
         参数：
-            elem: 要提取文本的 defusedxml.minidom.Element 元素
+            elem: 要提取文本的 lxml.etree._Element 元素
 
         返回：
             str: 元素内所有非空白文本节点拼接而成的文本
         """
-        text_parts = []
-        for node in elem.childNodes:
-            if node.nodeType == node.TEXT_NODE:
-                # 跳过仅包含空白字符的文本节点（XML 格式）
-                if node.data.strip():
-                    text_parts.append(node.data)
-            elif node.nodeType == node.ELEMENT_NODE:
-                text_parts.append(self._get_element_text(node))
-        return "".join(text_parts)
+        # itertext 按文档顺序产出 text/tail（不含注释和 elem 自身的 tail）
+        return "".join(text for text in elem.itertext() if text.strip())
 
     def replace_node(self, elem, new_content):
         """
         用新的 XML 内容替换 DOM 元素。
 
         参数：
-            elem: 要替换的 defusedxml.minidom.Element 元素
+            elem: 要替换的 lxml.etree._Element 元素
             new_content: 包含用于替换的 XML 的字符串
 
         返回：
-            List[defusedxml.minidom.Node]: 所有插入的节点
+            List[lxml.etree._Element]: 所有插入的元素
 
         示例：
             new_nodes = editor.replace_node(old_elem, "<w:r><w:t>文本</w:t></w:r>")
         """
-        parent = elem.parentNode
+        parent = elem.getparent()
         nodes = self._parse_fragment(new_content)
         for node in nodes:
-            parent.insertBefore(node, elem)
-        parent.removeChild(elem)
+            elem.addprevious(node)
+        # lxml 移除元素时会连同其 tail 一起移除，这里把 tail 留在原位置
+        if elem.tail:
+            nodes[-1].tail = (nodes[-1].tail or "") + elem.tail
+        parent.remove(elem)
         return nodes
 
     def insert_after(self, elem, xml_content):
@@ -227,23 +291,20 @@ class XMLEditor:
         在 DOM 元素之后插入 XML 内容。
 
         参数：
-            elem: 要在其后插入的 defusedxml.minidom.Element 元素
+            elem: 要在其后插入的 lxml.etree._Element 元素
             xml_content: 包含要插入的 XML 的字符串
 
         返回：
-            List[defusedxml.minidom.Node]: 所有插入的节点
+            List[lxml.etree._Element]: 所有插入的元素
 
         示例：
             new_nodes = editor.insert_after(elem, "<w:r><w:t>文本</w:t></w:r>")
         """
-        parent = elem.parentNode
-        next_sibling = elem.nextSibling
         nodes = self._parse_fragment(xml_content)
+        anchor = elem
         for node in nodes:
-            if next_sibling:
-                parent.insertBefore(node, next_sibling)
-            else:
-                parent.appendChild(node)
+            anchor.addnext(node)
+            anchor = node
         return nodes
 
     def insert_before(self, elem, xml_content):
@@ -251,19 +312,18 @@ class XMLEditor:
         在 DOM 元素之前插入 XML 内容。
 
         参数：
-            elem: 要在其前插入的 defusedxml.minidom.Element 元素
+            elem: 要在其前插入的 lxml.etree._Element 元素
             xml_content: 包含要插入的 XML 的字符串
 
         返回：
-            List[defusedxml.minidom.Node]: 所有插入的节点
+            List[lxml.etree._Element]: 所有插入的元素
 
         示例：
             new_nodes = editor.insert_before(elem, "<w:r><w:t>文本</w:t></w:r>")
         """
-        parent = elem.parentNode
         nodes = self._parse_fragment(xml_content)
         for node in nodes:
-            parent.insertBefore(node, elem)
+            elem.addprevious(node)
         return nodes
 
     def append_to(self, elem, xml_content):
@@ -271,25 +331,24 @@ class XMLEditor:
         将 XML 内容作为子节点追加到 DOM 元素。
 
         参数：
-            elem: 要追加到的 defusedxml.minidom.Element 元素
+            elem: 要追加到的 lxml.etree._Element 元素
             xml_content: 包含要追加的 XML 的字符串
 
         返回：
-            List[defusedxml.minidom.Node]: 所有插入的节点
+            List[lxml.etree._Element]: 所有插入的元素
 
         示例：
             new_nodes = editor.append_to(elem, "<w:r><w:t>文本</w:t></w:r>")
         """
         nodes = self._parse_fragment(xml_content)
-        for node in nodes:
-            elem.appendChild(node)
+        elem.extend(nodes)
         return nodes
 
     def get_next_rid(self):
         """获取关系文件的下一个可用 rId。"""
         max_id = 0
-        for rel_elem in self.dom.getElementsByTagName("Relationship"):
-            rel_id = rel_elem.getAttribute("Id")
+        for rel_elem in self.iter_tag("Relationship"):
+            rel_id = rel_elem.get("Id", "")
             if rel_id.startswith("rId"):
                 try:
                     max_id = max(max_id, int(rel_id[3:]))
@@ -303,69 +362,67 @@ class XMLEditor:
 
         将 DOM 树序列化并写回原始文件路径，
         保持原始编码（ascii 或 utf-8）。
+
+        使用 lxml.etree.xmlfile 增量写入临时文件，不在内存中构造整个文档的
+        字节串，写完后用 os.replace 原子地替换原文件。
+        """
+        tmp_path = self.xml_path.with_name(self.xml_path.name + ".tmp")
+        root = self.dom.getroot()
+        try:
+            if root.getnext() is not None:
+                # xmlfile 不允许在根元素之后写入节点，这种少见情况整体序列化
+                tmp_path.write_bytes(self.to_bytes())
+            else:
+                with lxml.etree.xmlfile(str(tmp_path), encoding=self.encoding) as xf:
+                    xf.write_declaration(standalone=self.dom.docinfo.standalone or None)
+                    # 根元素之前的注释和处理指令
+                    for node in reversed(list(root.itersiblings(preceding=True))):
+                        xf.write(node)
+                    xf.write(root)
+            os.replace(tmp_path, self.xml_path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+    def to_bytes(self):
         """
-        content = self.dom.toxml(encoding=self.encoding)
-        self.xml_path.write_bytes(content)
+        将 DOM 树序列化为字节串（与 save() 写入文件的内容相同）。
+
+        返回：
+            带 XML 声明的字节串，使用原始编码（ascii 或 utf-8）
+        """
+        return lxml.etree.tostring(
+            self.dom,
+            xml_declaration=True,
+            encoding=self.encoding,
+            # 未声明 standalone 时 docinfo 返回 False，此时不输出该属性
+            standalone=self.dom.docinfo.standalone or None,
+        )
 
     def _parse_fragment(self, xml_content):
         """
-        解析 XML 片段并返回导入的节点列表。
+        解析 XML 片段并返回其中的元素列表。
 
         参数：
             xml_content: 包含 XML 片段的字符串
 
         返回：
-            导入到此文档的 defusedxml.minidom.Node 对象列表
+            片段中顶层 lxml.etree._Element 元素的列表（元素之间的空白保留在 tail 中）
 
         异常：
             AssertionError: 如果片段不包含元素节点
         """
-        # 从根文档元素提取命名空间声明
-        root_elem = self.dom.documentElement
-        namespaces = []
-        if root_elem and root_elem.attributes:
-            for i in range(root_elem.attributes.length):
-                attr = root_elem.attributes.item(i)
-                if attr.name.startswith("xmlns"):  # type: ignore
-                    namespaces.append(f'{attr.name}="{attr.value}"')  # type: ignore
-
-        ns_decl = " ".join(namespaces)
+        # 使用根文档元素的命名空间声明包装片段
+        ns_decl = " ".join(
+            f'xmlns:{prefix}="{uri}"' if prefix else f'xmlns="{uri}"'
+            for prefix, uri in self._nsmap.items()
+        )
         wrapper = f"<root {ns_decl}>{xml_content}</root>"
-        fragment_doc = defusedxml.minidom.parseString(wrapper)
-        nodes = [
-            self.dom.importNode(child, deep=True)
-            for child in fragment_doc.documentElement.childNodes  # type: ignore
-        ]
-        elements = [n for n in nodes if n.nodeType == n.ELEMENT_NODE]
+        fragment_root = lxml.etree.fromstring(wrapper, XML_PARSER)
+        elements = [child for child in fragment_root if isinstance(child.tag, str)]
         assert elements, "片段必须包含至少一个元素"
-        return nodes
-
-
-def _create_line_tracking_parser():
-    """
-    创建一个跟踪每个元素行号和列号的 SAX 解析器。
-
-    通过猴子补丁修改 SAX 内容处理器，将底层 expat 解析器的当前行号和列号
-    位置存储到每个元素上，作为 parse_position 属性（行号, 列号）元组。
-
-    返回：
-        defusedxml.sax.xmlreader.XMLReader: 配置好的 SAX 解析器
-    """
-
-    def set_content_handler(dom_handler):
-        def startElementNS(name, tagName, attrs):
-            orig_start_cb(name, tagName, attrs)
-            cur_elem = dom_handler.elementStack[-1]
-            cur_elem.parse_position = (
-                parser._parser.CurrentLineNumber,  # type: ignore
-                parser._parser.CurrentColumnNumber,  # type: ignore
-            )
-
-        orig_start_cb = dom_handler.startElementNS
-        dom_handler.startElementNS = startElementNS
-        orig_set_content_handler(dom_handler)
-
-    parser = defusedxml.sax.make_parser()
-    orig_set_content_handler = parser.setContentHandler
-    parser.setContentHandler = set_content_handler  # type: ignore
-    return parser
+        # 片段内的行号没有意义，清除后新节点不会被 line_number 过滤器匹配
+        for child in elements:
+            for node in child.iter():
+                node.sourceline = 0
+        return elements
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from collections import defaultdict
 import json
 import sys
 
@@ -7,11 +7,8 @@ import sys
 # 参见 forms.md。
 
 
-@dataclass
-class RectAndField:
-    rect: list[float]
-    rect_type: str
-    field: dict
+# 第 i 个框属于字段 i // 2：偶数为标签框，奇数为输入框。
+RECT_TYPES = ("label", "entry")
 
 
 # 返回要打印到标准输出供 Claude 读取的消息列表。
@@ -20,37 +17,53 @@ def get_bounding_box_messages(fields_json_stream) -> list[str]:
     fields = json.load(fields_json_stream)
     messages.append(f"已读取 {len(fields['form_fields'])} 个字段")
 
-    def rects_intersect(r1, r2):
-        disjoint_horizontal = r1[0] >= r2[2] or r1[2] <= r2[0]
-        disjoint_vertical = r1[1] >= r2[3] or r1[3] <= r2[1]
-        return not (disjoint_horizontal or disjoint_vertical)
+    # 按列存放：rects[i] 为第 i 个框，所属字段和框类型由 i 推出，不为每个框创建对象
+    form_fields = fields["form_fields"]
+    rects = []
+    for f in form_fields:
+        rects.append(f["label_bounding_box"])
+        rects.append(f["entry_bounding_box"])
 
-    rects_and_fields = []
-    for f in fields["form_fields"]:
-        rects_and_fields.append(RectAndField(f["label_bounding_box"], "label", f))
-        rects_and_fields.append(RectAndField(f["entry_bounding_box"], "entry", f))
+    # 每页按 x0 扫描：只与水平方向上仍可能重叠的框比较，避免 O(N^2) 两两比较。
+    # 结果按 (i, j) 排序，消息顺序与逐对比较时完全相同。
+    intersecting = defaultdict(list)
+    pages = defaultdict(list)
+    for i, rect in enumerate(rects):
+        pages[form_fields[i >> 1]["page_number"]].append((rect[0], i, rect))
+    for page_rects in pages.values():
+        page_rects.sort(key=lambda entry: entry[0])
+        # 活动列表保存 (x2, 索引, x0, y0, y2)，扫描时无需再回查 rects
+        active = []
+        for x0, i, rect in page_rects:
+            y0, x2, y2 = rect[1], rect[2], rect[3]
+            # x2 <= 当前 x0 的框与之后所有框都不相交（后续框的 x0 只会更大）
+            active = [entry for entry in active if entry[0] > x0]
+            # 剩余框已满足 other_x2 > x0，只需检查另外三个条件
+            for _, j, other_x0, other_y0, other_y2 in active:
+                if x2 > other_x0 and y0 < other_y2 and y2 > other_y0:
+                    intersecting[min(i, j)].append(max(i, j))
+            active.append((x2, i, x0, y0, y2))
 
     has_error = False
-    for i, ri in enumerate(rects_and_fields):
-        # 这是 O(N^2) 复杂度；如果成为问题，我们可以进行优化。
-        for j in range(i + 1, len(rects_and_fields)):
-            rj = rects_and_fields[j]
-            if ri.field["page_number"] == rj.field["page_number"] and rects_intersect(ri.rect, rj.rect):
-                has_error = True
-                if ri.field is rj.field:
-                    messages.append(f"失败：`{ri.field['description']}` 的标签和输入边界框相交 ({ri.rect}, {rj.rect})")
-                else:
-                    messages.append(f"失败：`{ri.field['description']}` 的 {ri.rect_type} 边界框 ({ri.rect}) 与 `{rj.field['description']}` 的 {rj.rect_type} 边界框 ({rj.rect}) 相交")
-                if len(messages) >= 20:
-                    messages.append("中止进一步检查；修复边界框后重试")
-                    return messages
-        if ri.rect_type == "entry":
-            if "entry_text" in ri.field:
-                font_size = ri.field["entry_text"].get("font_size", 14)
-                entry_height = ri.rect[3] - ri.rect[1]
+    for i, rect in enumerate(rects):
+        field = form_fields[i >> 1]
+        for j in sorted(intersecting[i]):
+            other_field = form_fields[j >> 1]
+            has_error = True
+            if field is other_field:
+                messages.append(f"失败：`{field['description']}` 的标签和输入边界框相交 ({rect}, {rects[j]})")
+            else:
+                messages.append(f"失败：`{field['description']}` 的 {RECT_TYPES[i & 1]} 边界框 ({rect}) 与 `{other_field['description']}` 的 {RECT_TYPES[j & 1]} 边界框 ({rects[j]}) 相交")
+            if len(messages) >= 20:
+                messages.append("中止进一步检查；修复边界框后重试")
+                return messages
+        if i & 1:
+            if "entry_text" in field:
+                font_size = field["entry_text"].get("font_size", 14)
+                entry_height = rect[3] - rect[1]
                 if entry_height < font_size:
                     has_error = True
-                    messages.append(f"失败：`{ri.field['description']}` 的输入边界框高度 ({entry_height}) 对于文本内容来说太短（字体大小：{font_size}）。增加框高度或减小字体大小。")
+                    messages.append(f"失败：`{field['description']}` 的输入边界框高度 ({entry_height}) 对于文本内容来说太短（字体大小：{font_size}）。增加框高度或减小字体大小。")
                     if len(messages) >= 20:
                         messages.append("中止进一步检查；修复边界框后重试")
                         return messages
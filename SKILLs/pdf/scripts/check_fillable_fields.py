@@ -5,8 +5,18 @@ from pypdf import PdfReader
 # 供 Claude 运行的脚本，用于确定 PDF 是否具有可填充的表单字段。参见 forms.md。
 
 
+def has_fillable_fields(reader):
+    # 只查看目录中的 /AcroForm /Fields，而不像 get_fields() 那样遍历整个字段树
+    acro_form = reader.trailer["/Root"].get("/AcroForm")
+    if acro_form is None:
+        return False
+    # /Fields 可以是间接引用，需先解析再计算长度
+    fields = acro_form.get_object().get("/Fields")
+    return fields is not None and len(fields.get_object()) > 0
+
+
 reader = PdfReader(sys.argv[1])
-if (reader.get_fields()):
+if has_fillable_fields(reader):
     print("此 PDF 具有可填充的表单字段")
 else:
     print("此 PDF 不具有可填充的表单字段；您需要以视觉方式确定数据输入位置")
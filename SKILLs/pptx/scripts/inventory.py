@@ -23,13 +23,20 @@
 """
 
 import argparse
+import functools
 import json
 import platform
 import sys
 from dataclasses import dataclass
+from operator import attrgetter
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，缺失时回退到标准库 json
+    orjson = None
+import lxml.etree
 from PIL import Image, ImageDraw, ImageFont
 from pptx import Presentation
 from pptx.enum.text import PP_ALIGN
@@ -46,6 +53,26 @@ InventoryData = Dict[
 ]  # 幻灯片ID -> {形状ID -> ShapeData} 的字典
 InventoryDict = Dict[str, Dict[str, ShapeDict]]  # 可序列化为 JSON 的清单
 
+# 每 EMU（英制公制单位）对应的英寸数
+INCHES_PER_EMU = 1 / 914400
+
+# 96 DPI 下每磅对应的像素数
+PX_PER_PT = 96 / 72
+
+# 视为重叠的最小重叠量（英寸）
+OVERLAP_TOLERANCE = 0.05
+
+# DrawingML 项目符号元素的限定标签名
+_A_NS = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+_A_BU_CHAR = f"{_A_NS}buChar"
+_A_BU_AUTO_NUM = f"{_A_NS}buAutoNum"
+
+# 表示手动项目符号的常见符号（后跟空格）
+MANUAL_BULLET_PREFIXES = ("• ", "● ", "○ ")
+
+# 预先生成的常用形状 ID，所有幻灯片共享同一组字符串
+_SHAPE_IDS = tuple(f"shape-{idx}" for idx in range(256))
+
 
 def main():
     """命令行使用的主入口点。"""
@@ -125,7 +152,127 @@ def main():
         sys.exit(1)
 
 
-@dataclass
+def _font_extensions() -> Tuple[str, ...]:
+    """当前平台上查找的字体文件扩展名。"""
+    if platform.system() == "Darwin":  # macOS
+        return (".ttf", ".otf", ".ttc", ".dfont")
+    return (".ttf", ".otf")
+
+
+@functools.cache
+def _font_index() -> List[Dict[str, str]]:
+    """扫描一次平台字体目录，按目录顺序返回 {文件名 -> 路径} 字典的列表。"""
+    # 按平台定义字体目录
+    if platform.system() == "Darwin":  # macOS
+        font_dirs = [
+            "/System/Library/Fonts/",
+            "/Library/Fonts/",
+            "~/Library/Fonts/",
+        ]
+    else:  # Linux
+        font_dirs = [
+            "/usr/share/fonts/truetype/",
+            "/usr/local/share/fonts/",
+            "~/.fonts/",
+        ]
+
+    index = []
+    for font_dir in font_dirs:
+        font_dir_path = Path(font_dir).expanduser()
+        if not font_dir_path.exists():
+            continue
+        try:
+            files = {
+                file_path.name: str(file_path)
+                for file_path in font_dir_path.iterdir()
+                if file_path.is_file()
+            }
+        except (OSError, PermissionError):
+            files = {}
+        index.append(files)
+    return index
+
+
+@functools.cache
+def _measuring_draw() -> Any:
+    """用于 textlength 测量的 1x1 画布绘图对象，只创建一次。"""
+    return ImageDraw.Draw(Image.new("RGB", (1, 1)))
+
+
+@functools.cache
+def _default_font() -> Any:
+    """PIL 内置默认字体，只加载一次。"""
+    return ImageFont.load_default()
+
+
+@functools.lru_cache(maxsize=512)
+def _load_font(font_path: Optional[str], size: int) -> Any:
+    """按 (路径, 字号) 缓存加载的字体；无法加载时返回默认字体。"""
+    if font_path:
+        try:
+            return ImageFont.truetype(font_path, size=size)
+        except Exception:
+            pass
+    return _default_font()
+
+
+def _layout_default_font_sizes(slide_layout: Any) -> Dict[Any, Optional[float]]:
+    """返回布局中 {占位符类型 -> 默认字体大小（磅）} 的字典，每个布局只构建一次。
+
+    同类型的占位符只取第一个；字体大小取其中第一个带 sz 属性的 defRPr 元素。
+    结果缓存在布局对象上，同一布局的所有幻灯片共用。
+    """
+    sizes = getattr(slide_layout, "_default_font_sizes", None)
+    if sizes is not None:
+        return sizes
+
+    sizes = {}
+    for layout_placeholder in slide_layout.placeholders:
+        placeholder_type = layout_placeholder.placeholder_format.type
+        if placeholder_type in sizes:
+            continue
+        sizes[placeholder_type] = None
+        # 查找第一个带有 sz（大小）属性的 defRPr 元素
+        for elem in layout_placeholder.element.iter():
+            if "defRPr" in elem.tag and (sz := elem.get("sz")):
+                sizes[placeholder_type] = float(sz) / 100.0  # 将 EMU 转换为磅
+                break
+
+    try:
+        slide_layout._default_font_sizes = sizes
+    except AttributeError:
+        pass  # 布局对象不允许添加属性时每次重新构建
+    return sizes
+
+
+def _master_default_font_size(slide_master: Any, style_name: str) -> int:
+    """返回母版中给定文本样式的默认字体大小（磅），未找到时返回 14。
+
+    只遍历名为 style_name 的样式元素，并在第一个带 sz 属性的元素处停止；
+    结果按样式名称缓存在母版对象上。
+    """
+    sizes = getattr(slide_master, "_default_font_sizes", None)
+    if sizes is None:
+        sizes = {}
+        try:
+            slide_master._default_font_sizes = sizes
+        except AttributeError:
+            pass  # 母版对象不允许添加属性时每次重新查找
+    if style_name in sizes:
+        return sizes[style_name]
+
+    size = 14  # 正文文本的保守默认值
+    for style in slide_master.element.iter(f"{{*}}{style_name}"):
+        sz = next((elem.get("sz") for elem in style.iter() if "sz" in elem.attrib), None)
+        if sz is not None:
+            size = int(sz) // 100
+            break
+
+    sizes[style_name] = size
+    return size
+
+
+@dataclass(slots=True)
 class ShapeWithPosition:
     """带有幻灯片上绝对位置的形状。"""
 
@@ -137,6 +284,39 @@ class ShapeWithPosition:
 class ParagraphData:
     """从 PowerPoint 段落中提取的段落属性数据结构。"""
 
+    __slots__ = (
+        "text",
+        "bullet",
+        "level",
+        "alignment",
+        "space_before",
+        "space_after",
+        "font_name",
+        "font_size",
+        "bold",
+        "italic",
+        "underline",
+        "color",
+        "theme_color",
+        "line_spacing",
+    )
+
+    # to_dict 中按顺序输出的可选字段（bullet 单独处理）
+    _OPTIONAL_FIELDS = (
+        "level",
+        "alignment",
+        "space_before",
+        "space_after",
+        "font_name",
+        "font_size",
+        "bold",
+        "italic",
+        "underline",
+        "color",
+        "theme_color",
+        "line_spacing",
+    )
+
     def __init__(self, paragraph: Any):
         """从 PowerPoint 段落对象初始化。
 
@@ -165,11 +345,7 @@ class ParagraphData:
             and paragraph._p.pPr is not None
         ):
             pPr = paragraph._p.pPr
-            ns = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
-            if (
-                pPr.find(f"{ns}buChar") is not None
-                or pPr.find(f"{ns}buAutoNum") is not None
-            ):
+            if next(pPr.iterchildren(_A_BU_CHAR, _A_BU_AUTO_NUM), None) is not None:
                 self.bullet = True
                 if hasattr(paragraph, "level"):
                     self.level = paragraph.level
@@ -232,44 +408,78 @@ class ParagraphData:
         """转换为字典以便 JSON 序列化，排除 None 值。"""
         result: ParagraphDict = {"text": self.text}
 
-        # 仅添加有值的可选字段
+        # 仅添加有值的可选字段：bullet 仅在为 True 时输出，其余字段只要不是 None
+        # 就输出（bold=False、level=0 等均保留）
         if self.bullet:
             result["bullet"] = self.bullet
-        if self.level is not None:
-            result["level"] = self.level
-        if self.alignment:
-            result["alignment"] = self.alignment
-        if self.space_before is not None:
-            result["space_before"] = self.space_before
-        if self.space_after is not None:
-            result["space_after"] = self.space_after
-        if self.font_name:
-            result["font_name"] = self.font_name
-        if self.font_size is not None:
-            result["font_size"] = self.font_size
-        if self.bold is not None:
-            result["bold"] = self.bold
-        if self.italic is not None:
-            result["italic"] = self.italic
-        if self.underline is not None:
-            result["underline"] = self.underline
-        if self.color:
-            result["color"] = self.color
-        if self.theme_color:
-            result["theme_color"] = self.theme_color
-        if self.line_spacing is not None:
-            result["line_spacing"] = self.line_spacing
+        result.update(
+            {
+                name: value
+                for name in self._OPTIONAL_FIELDS
+                if (value := getattr(self, name)) is not None
+            }
+        )
 
         return result
 
 
+# 按段落 XML 缓存的 ParagraphData，模板化幻灯片中重复的段落只解析一次
+_PARAGRAPH_CACHE: Dict[bytes, ParagraphData] = {}
+_PARAGRAPH_CACHE_SIZE = 4096
+
+
+def _paragraph_data(paragraph: Any) -> ParagraphData:
+    """返回段落的 ParagraphData，XML 完全相同的段落共用同一个对象。
+
+    ParagraphData 只读取 a:p 元素自身及其后代，因此序列化后的 XML 可以作为键。
+    """
+    p = getattr(paragraph, "_p", None)
+    if p is None:
+        return ParagraphData(paragraph)
+
+    key = lxml.etree.tostring(p)
+    para_data = _PARAGRAPH_CACHE.get(key)
+    if para_data is None:
+        para_data = ParagraphData(paragraph)
+        if len(_PARAGRAPH_CACHE) >= _PARAGRAPH_CACHE_SIZE:
+            # 移除最早加入的条目
+            del _PARAGRAPH_CACHE[next(iter(_PARAGRAPH_CACHE))]
+        _PARAGRAPH_CACHE[key] = para_data
+    return para_data
+
+
 class ShapeData:
     """从 PowerPoint 形状中提取的形状属性数据结构。"""
 
+    __slots__ = (
+        "shape",
+        "shape_id",
+        "slide_width_emu",
+        "slide_height_emu",
+        "placeholder_type",
+        "default_font_size",
+        "left",
+        "top",
+        "width",
+        "height",
+        "left_emu",
+        "top_emu",
+        "width_emu",
+        "height_emu",
+        "frame_overflow_bottom",
+        "slide_overflow_right",
+        "slide_overflow_bottom",
+        "overlapping_shapes",
+        "warnings",
+        "_text_paragraphs_cache",
+        "_paragraphs_cache",
+        "_dict_cache",
+    )
+
     @staticmethod
     def emu_to_inches(emu: int) -> float:
         """将 EMU（英制公制单位）转换为英寸。"""
-        return emu / 914400.0
+        return emu * INCHES_PER_EMU
 
     @staticmethod
     def inches_to_pixels(inches: float, dpi: int = 96) -> int:
@@ -277,17 +487,18 @@ class ShapeData:
         return int(inches * dpi)
 
     @staticmethod
+    @functools.lru_cache(maxsize=256)
     def get_font_path(font_name: str) -> Optional[str]:
         """获取给定字体名称的字体文件路径。
 
+        结果按字体名称缓存，字体目录只在首次调用时扫描一次。
+
         参数：
             font_name: 字体名称（例如 'Arial'、'Calibri'）
 
         返回：
             字体文件路径，如果未找到则返回 None
         """
-        system = platform.system()
-
         # 要尝试的常见字体文件变体
         font_variations = [
             font_name,
@@ -295,50 +506,24 @@ class ShapeData:
             font_name.replace(" ", ""),
             font_name.replace(" ", "-"),
         ]
+        font_name_lower = font_name.lower().replace(" ", "")
+        extensions = _font_extensions()
 
-        # 按平台定义字体目录和扩展名
-        if system == "Darwin":  # macOS
-            font_dirs = [
-                "/System/Library/Fonts/",
-                "/Library/Fonts/",
-                "~/Library/Fonts/",
-            ]
-            extensions = [".ttf", ".otf", ".ttc", ".dfont"]
-        else:  # Linux
-            font_dirs = [
-                "/usr/share/fonts/truetype/",
-                "/usr/local/share/fonts/",
-                "~/.fonts/",
-            ]
-            extensions = [".ttf", ".otf"]
-
-        # 尝试查找字体文件
-        from pathlib import Path
-
-        for font_dir in font_dirs:
-            font_dir_path = Path(font_dir).expanduser()
-            if not font_dir_path.exists():
-                continue
-
+        for files in _font_index():
             # 首先尝试精确匹配
             for variant in font_variations:
                 for ext in extensions:
-                    font_path = font_dir_path / f"{variant}{ext}"
-                    if font_path.exists():
-                        return str(font_path)
+                    font_path = files.get(f"{variant}{ext}")
+                    if font_path:
+                        return font_path
 
             # 然后尝试模糊匹配 - 查找包含字体名称的文件
-            try:
-                for file_path in font_dir_path.iterdir():
-                    if file_path.is_file():
-                        file_name_lower = file_path.name.lower()
-                        font_name_lower = font_name.lower().replace(" ", "")
-                        if font_name_lower in file_name_lower and any(
-                            file_name_lower.endswith(ext) for ext in extensions
-                        ):
-                            return str(file_path)
-            except (OSError, PermissionError):
-                continue
+            for file_name, font_path in files.items():
+                file_name_lower = file_name.lower()
+                if font_name_lower in file_name_lower and any(
+                    file_name_lower.endswith(ext) for ext in extensions
+                ):
+                    return font_path
 
         return None
 
@@ -374,13 +559,7 @@ class ShapeData:
                 return None
 
             shape_type = shape.placeholder_format.type  # type: ignore
-            for layout_placeholder in slide_layout.placeholders:
-                if layout_placeholder.placeholder_format.type == shape_type:
-                    # 查找第一个带有 sz（大小）属性的 defRPr 元素
-                    for elem in layout_placeholder.element.iter():
-                        if "defRPr" in elem.tag and (sz := elem.get("sz")):
-                            return float(sz) / 100.0  # 将 EMU 转换为磅
-                    break
+            return _layout_default_font_sizes(slide_layout).get(shape_type)
         except Exception:
             pass
         return None
@@ -403,6 +582,11 @@ class ShapeData:
         self.shape = shape  # 存储对原始形状的引用
         self.shape_id: str = ""  # 将在排序后设置
 
+        # 段落在首次访问时计算并缓存
+        self._text_paragraphs_cache: Optional[List[Tuple[int, Any, ParagraphData]]] = None
+        self._paragraphs_cache: Optional[List[ParagraphData]] = None
+        self._dict_cache: Optional[ShapeDict] = None
+
         # 从幻灯片对象获取幻灯片尺寸
         self.slide_width_emu, self.slide_height_emu = (
             self.get_slide_dimensions(slide) if slide else (None, None)
@@ -411,47 +595,38 @@ class ShapeData:
         # 如果适用，获取占位符类型
         self.placeholder_type: Optional[str] = None
         self.default_font_size: Optional[float] = None
-        if hasattr(shape, "is_placeholder") and shape.is_placeholder:  # type: ignore
+        if getattr(shape, "is_placeholder", False):
             if shape.placeholder_format and shape.placeholder_format.type:  # type: ignore
                 self.placeholder_type = (
                     str(shape.placeholder_format.type).split(".")[-1].split(" ")[0]  # type: ignore
                 )
 
                 # 从布局获取默认字体大小
-                if slide and hasattr(slide, "slide_layout"):
+                slide_layout = getattr(slide, "slide_layout", None) if slide else None
+                if slide_layout is not None:
                     self.default_font_size = self.get_default_font_size(
-                        shape, slide.slide_layout
+                        shape, slide_layout
                     )
 
-        # 获取位置信息
+        # 获取位置信息（每个属性只读取一次）
         # 如果提供了绝对位置（用于分组中的形状），则使用绝对位置，否则使用形状的位置
         left_emu = (
-            absolute_left
-            if absolute_left is not None
-            else (shape.left if hasattr(shape, "left") else 0)
-        )
-        top_emu = (
-            absolute_top
-            if absolute_top is not None
-            else (shape.top if hasattr(shape, "top") else 0)
+            absolute_left if absolute_left is not None else getattr(shape, "left", 0)
         )
+        top_emu = absolute_top if absolute_top is not None else getattr(shape, "top", 0)
+        width_emu = getattr(shape, "width", 0)
+        height_emu = getattr(shape, "height", 0)
 
-        self.left: float = round(self.emu_to_inches(left_emu), 2)  # type: ignore
-        self.top: float = round(self.emu_to_inches(top_emu), 2)  # type: ignore
-        self.width: float = round(
-            self.emu_to_inches(shape.width if hasattr(shape, "width") else 0),
-            2,  # type: ignore
-        )
-        self.height: float = round(
-            self.emu_to_inches(shape.height if hasattr(shape, "height") else 0),
-            2,  # type: ignore
-        )
+        self.left: float = round(left_emu * INCHES_PER_EMU, 2)  # type: ignore
+        self.top: float = round(top_emu * INCHES_PER_EMU, 2)  # type: ignore
+        self.width: float = round(width_emu * INCHES_PER_EMU, 2)  # type: ignore
+        self.height: float = round(height_emu * INCHES_PER_EMU, 2)  # type: ignore
 
         # 存储 EMU 位置用于溢出计算
         self.left_emu = left_emu
         self.top_emu = top_emu
-        self.width_emu = shape.width if hasattr(shape, "width") else 0
-        self.height_emu = shape.height if hasattr(shape, "height") else 0
+        self.width_emu = width_emu
+        self.height_emu = height_emu
 
         # 计算溢出状态
         self.frame_overflow_bottom: Optional[float] = None
@@ -466,16 +641,29 @@ class ShapeData:
         self._detect_bullet_issues()
 
     @property
-    def paragraphs(self) -> List[ParagraphData]:
-        """从形状的文本框计算段落。"""
-        if not self.shape or not hasattr(self.shape, "text_frame"):
-            return []
+    def _text_paragraphs(self) -> List[Tuple[int, Any, ParagraphData]]:
+        """文本框中的非空段落：(段落索引, 原始段落, ParagraphData)，只遍历一次。"""
+        if self._text_paragraphs_cache is None:
+            text_frame = getattr(self.shape, "text_frame", None) if self.shape else None
+            self._text_paragraphs_cache = (
+                [
+                    (para_idx, paragraph, _paragraph_data(paragraph))
+                    for para_idx, paragraph in enumerate(text_frame.paragraphs)
+                    if paragraph.text.strip()
+                ]
+                if text_frame
+                else []
+            )
+        return self._text_paragraphs_cache
 
-        paragraphs = []
-        for paragraph in self.shape.text_frame.paragraphs:  # type: ignore
-            if paragraph.text.strip():
-                paragraphs.append(ParagraphData(paragraph))
-        return paragraphs
+    @property
+    def paragraphs(self) -> List[ParagraphData]:
+        """从形状的文本框计算段落（首次访问后缓存）。"""
+        if self._paragraphs_cache is None:
+            self._paragraphs_cache = [
+                para_data for _, _, para_data in self._text_paragraphs
+            ]
+        return self._paragraphs_cache
 
     def _get_default_font_size(self) -> int:
         """从主题文本样式获取默认字体大小，或使用保守的默认值。"""
@@ -494,13 +682,7 @@ class ShapeData:
             if self.placeholder_type and "TITLE" in self.placeholder_type:
                 style_name = "titleStyle"
 
-            # 在主题样式中查找字体大小
-            for child in slide_master.element.iter():
-                tag = child.tag.split("}")[-1] if "}" in child.tag else child.tag
-                if tag == style_name:
-                    for elem in child.iter():
-                        if "sz" in elem.attrib:
-                            return int(elem.attrib["sz"]) // 100
+            return _master_default_font_size(slide_master, style_name)
         except Exception:
             pass
 
@@ -512,14 +694,10 @@ class ShapeData:
         margins = {"top": 0.05, "bottom": 0.05, "left": 0.1, "right": 0.1}
 
         # 如果设置了实际边距，则覆盖默认值
-        if hasattr(text_frame, "margin_top") and text_frame.margin_top:
-            margins["top"] = self.emu_to_inches(text_frame.margin_top)
-        if hasattr(text_frame, "margin_bottom") and text_frame.margin_bottom:
-            margins["bottom"] = self.emu_to_inches(text_frame.margin_bottom)
-        if hasattr(text_frame, "margin_left") and text_frame.margin_left:
-            margins["left"] = self.emu_to_inches(text_frame.margin_left)
-        if hasattr(text_frame, "margin_right") and text_frame.margin_right:
-            margins["right"] = self.emu_to_inches(text_frame.margin_right)
+        for side in margins:
+            margin = getattr(text_frame, f"margin_{side}", None)
+            if margin:
+                margins[side] = margin * INCHES_PER_EMU
 
         # 计算可用区域
         usable_width = self.width - margins["left"] - margins["right"]
@@ -540,19 +718,30 @@ class ShapeData:
         if draw.textlength(line, font=font) <= max_width_px:
             return [line]
 
-        # 需要换行 - 按单词分割
+        # 单个过长的单词无法再换行
+        if " " not in line:
+            return [line]
+
+        # 需要换行 - 按单词分割，逐词累加宽度，而不是每次重新测量整行
         wrapped = []
         words = line.split(" ")
+        space_width = draw.textlength(" ", font=font)
         current_line = ""
+        current_width = 0.0
 
         for word in words:
-            test_line = current_line + (" " if current_line else "") + word
-            if draw.textlength(test_line, font=font) <= max_width_px:
-                current_line = test_line
+            word_width = draw.textlength(word, font=font)
+            test_width = (
+                current_width + space_width + word_width if current_line else word_width
+            )
+            if test_width <= max_width_px:
+                current_line = f"{current_line} {word}" if current_line else word
+                current_width = test_width
             else:
                 if current_line:
                     wrapped.append(current_line)
                 current_line = word
+                current_width = word_width
 
         if current_line:
             wrapped.append(current_line)
@@ -561,21 +750,17 @@ class ShapeData:
 
     def _estimate_frame_overflow(self) -> None:
         """使用 PIL 文本测量估算文本是否溢出形状边界。"""
-        if not self.shape or not hasattr(self.shape, "text_frame"):
+        if not self._text_paragraphs:
             return
-
         text_frame = self.shape.text_frame  # type: ignore
-        if not text_frame or not text_frame.paragraphs:
-            return
 
         # 获取考虑边距后的可用尺寸
         usable_width_px, usable_height_px = self._get_usable_dimensions(text_frame)
         if usable_width_px <= 0 or usable_height_px <= 0:
             return
 
-        # 设置 PIL 用于文本测量
-        dummy_img = Image.new("RGB", (1, 1))
-        draw = ImageDraw.Draw(dummy_img)
+        # PIL 用于文本测量的绘图对象（所有形状共用）
+        draw = _measuring_draw()
 
         # 从占位符获取默认字体大小，或使用保守估计
         default_font_size = self._get_default_font_size()
@@ -583,29 +768,24 @@ class ShapeData:
         # 计算所有段落的总高度
         total_height_px = 0
 
-        for para_idx, paragraph in enumerate(text_frame.paragraphs):
-            if not paragraph.text.strip():
-                continue
-
-            para_data = ParagraphData(paragraph)
+        # 同一形状中的段落通常共用字体，按 (字体名称, 字号) 只查找一次
+        fonts = {}
 
+        for para_idx, paragraph, para_data in self._text_paragraphs:
             # 加载此段落的字体
             font_name = para_data.font_name or "Arial"
             font_size = int(para_data.font_size or default_font_size)
 
-            font = None
-            font_path = self.get_font_path(font_name)
-            if font_path:
-                try:
-                    font = ImageFont.truetype(font_path, size=font_size)
-                except Exception:
-                    font = ImageFont.load_default()
-            else:
-                font = ImageFont.load_default()
+            font = fonts.get((font_name, font_size))
+            if font is None:
+                font = _load_font(self.get_font_path(font_name), font_size)
+                fonts[font_name, font_size] = font
 
-            # 换行此段落中的所有行
+            # 换行此段落中的所有行（常见的单行段落无需 split）
+            text = paragraph.text
+            lines = text.split("\n") if "\n" in text else (text,)
             all_wrapped_lines = []
-            for line in paragraph.text.split("\n"):
+            for line in lines:
                 wrapped = self._wrap_text_line(line, usable_width_px, draw, font)
                 all_wrapped_lines.extend(wrapped)
 
@@ -613,21 +793,21 @@ class ShapeData:
                 # 计算行高
                 if para_data.line_spacing:
                     # 显式设置的自定义行间距
-                    line_height_px = para_data.line_spacing * 96 / 72
+                    line_height_px = para_data.line_spacing * PX_PER_PT
                 else:
                     # PowerPoint 默认单倍行距（字体大小的 1.0 倍）
-                    line_height_px = font_size * 96 / 72
+                    line_height_px = font_size * PX_PER_PT
 
                 # 添加段前间距（第一段除外）
                 if para_idx > 0 and para_data.space_before:
-                    total_height_px += para_data.space_before * 96 / 72
+                    total_height_px += para_data.space_before * PX_PER_PT
 
                 # 添加段落文本高度
                 total_height_px += len(all_wrapped_lines) * line_height_px
 
                 # 添加段后间距
                 if para_data.space_after:
-                    total_height_px += para_data.space_after * 96 / 72
+                    total_height_px += para_data.space_after * PX_PER_PT
 
         # 检查溢出（忽略小于等于 0.05 英寸的微小溢出）
         if total_height_px > usable_height_px:
@@ -645,7 +825,7 @@ class ShapeData:
         right_edge_emu = self.left_emu + self.width_emu
         if right_edge_emu > self.slide_width_emu:
             overflow_emu = right_edge_emu - self.slide_width_emu
-            overflow_inches = round(self.emu_to_inches(overflow_emu), 2)
+            overflow_inches = round(overflow_emu * INCHES_PER_EMU, 2)
             if overflow_inches > 0.01:  # 仅报告显著的溢出
                 self.slide_overflow_right = overflow_inches
 
@@ -653,26 +833,15 @@ class ShapeData:
         bottom_edge_emu = self.top_emu + self.height_emu
         if bottom_edge_emu > self.slide_height_emu:
             overflow_emu = bottom_edge_emu - self.slide_height_emu
-            overflow_inches = round(self.emu_to_inches(overflow_emu), 2)
+            overflow_inches = round(overflow_emu * INCHES_PER_EMU, 2)
             if overflow_inches > 0.01:  # 仅报告显著的溢出
                 self.slide_overflow_bottom = overflow_inches
 
     def _detect_bullet_issues(self) -> None:
         """检测段落中的项目符号格式问题。"""
-        if not self.shape or not hasattr(self.shape, "text_frame"):
-            return
-
-        text_frame = self.shape.text_frame  # type: ignore
-        if not text_frame or not text_frame.paragraphs:
-            return
-
-        # 表示手动项目符号的常见符号
-        bullet_symbols = ["•", "●", "○"]
-
-        for paragraph in text_frame.paragraphs:
-            text = paragraph.text.strip()
+        for para_data in self.paragraphs:
             # 检查手动项目符号
-            if text and any(text.startswith(symbol + " ") for symbol in bullet_symbols):
+            if para_data.text.startswith(MANUAL_BULLET_PREFIXES):
                 self.warnings.append(
                     "manual_bullet_symbol: 请使用正确的项目符号格式"
                 )
@@ -690,7 +859,16 @@ class ShapeData:
         )
 
     def to_dict(self) -> ShapeDict:
-        """转换为字典以便 JSON 序列化。"""
+        """转换为字典以便 JSON 序列化。
+
+        结果在首次调用时计算并缓存；ShapeData 在清单构建完成后不再修改。
+        """
+        if self._dict_cache is None:
+            self._dict_cache = self._build_dict()
+        return self._dict_cache
+
+    def _build_dict(self) -> ShapeDict:
+        """根据形状属性构建可序列化为 JSON 的字典。"""
         result: ShapeDict = {
             "left": self.left,
             "top": self.top,
@@ -742,15 +920,16 @@ class ShapeData:
 def is_valid_shape(shape: BaseShape) -> bool:
     """检查形状是否包含有意义的文本内容。"""
     # 必须有包含内容的文本框
-    if not hasattr(shape, "text_frame") or not shape.text_frame:  # type: ignore
+    text_frame = getattr(shape, "text_frame", None)
+    if not text_frame:
         return False
 
-    text = shape.text_frame.text.strip()  # type: ignore
+    text = text_frame.text.strip()
     if not text:
         return False
 
     # 跳过幻灯片编号和数字页脚
-    if hasattr(shape, "is_placeholder") and shape.is_placeholder:  # type: ignore
+    if getattr(shape, "is_placeholder", False):
         if shape.placeholder_format and shape.placeholder_format.type:  # type: ignore
             placeholder_type = (
                 str(shape.placeholder_format.type).split(".")[-1].split(" ")[0]  # type: ignore
@@ -766,7 +945,7 @@ def is_valid_shape(shape: BaseShape) -> bool:
 def collect_shapes_with_absolute_positions(
     shape: BaseShape, parent_left: int = 0, parent_top: int = 0
 ) -> List[ShapeWithPosition]:
-    """递归收集所有具有有效文本的形状，并计算绝对位置。
+    """收集所有具有有效文本的形状（包括嵌套分组中的形状），并计算绝对位置。
 
     对于分组内的形状，它们的位置是相对于分组的。
     此函数通过累积父分组偏移量来计算幻灯片上的绝对位置。
@@ -779,40 +958,33 @@ def collect_shapes_with_absolute_positions(
     返回：
         具有绝对位置的 ShapeWithPosition 对象列表
     """
-    if hasattr(shape, "shapes"):  # GroupShape
-        result = []
-        # 获取此分组的位置
-        group_left = shape.left if hasattr(shape, "left") else 0
-        group_top = shape.top if hasattr(shape, "top") else 0
-
-        # 计算此分组的绝对位置
-        abs_group_left = parent_left + group_left
-        abs_group_top = parent_top + group_top
-
-        # 使用累积偏移量处理子形状
-        for child in shape.shapes:  # type: ignore
-            result.extend(
-                collect_shapes_with_absolute_positions(
-                    child, abs_group_left, abs_group_top
+    result = []
+    # 显式栈代替递归：嵌套分组不受递归深度限制，也不为每层创建中间列表
+    stack = [(shape, parent_left, parent_top)]
+    while stack:
+        shape, parent_left, parent_top = stack.pop()
+        shape_left = getattr(shape, "left", 0)
+        shape_top = getattr(shape, "top", 0)
+
+        if hasattr(shape, "shapes"):  # GroupShape
+            # 使用累积偏移量处理子形状；逆序入栈以保持原有的从前到后顺序
+            abs_group_left = parent_left + shape_left
+            abs_group_top = parent_top + shape_top
+            stack.extend(
+                (child, abs_group_left, abs_group_top)
+                for child in reversed(list(shape.shapes))  # type: ignore
+            )
+        elif is_valid_shape(shape):
+            # 常规形状 - 有有效文本时记录绝对位置
+            result.append(
+                ShapeWithPosition(
+                    shape=shape,
+                    absolute_left=parent_left + shape_left,
+                    absolute_top=parent_top + shape_top,
                 )
             )
-        return result
 
-    # 常规形状 - 检查是否有有效文本
-    if is_valid_shape(shape):
-        # 计算绝对位置
-        shape_left = shape.left if hasattr(shape, "left") else 0
-        shape_top = shape.top if hasattr(shape, "top") else 0
-
-        return [
-            ShapeWithPosition(
-                shape=shape,
-                absolute_left=parent_left + shape_left,
-                absolute_top=parent_top + shape_top,
-            )
-        ]
-
-    return []
+    return result
 
 
 def sort_shapes_by_position(shapes: List[ShapeData]) -> List[ShapeData]:
@@ -824,9 +996,11 @@ def sort_shapes_by_position(shapes: List[ShapeData]) -> List[ShapeData]:
         return shapes
 
     # 首先按顶部位置排序
-    shapes = sorted(shapes, key=lambda s: (s.top, s.left))
+    shapes = sorted(shapes, key=attrgetter("top", "left"))
 
-    # 按行分组形状（垂直方向相差 0.5 英寸以内）
+    # 按行分组形状（垂直方向相差 0.5 英寸以内）。行以首个形状的顶部为基准，
+    # 不能换成固定的 0.5 英寸分桶，否则跨桶边界的形状顺序和 shape ID 会改变
+    by_left = attrgetter("left")
     result = []
     row = [shapes[0]]
     row_top = shapes[0].top
@@ -836,19 +1010,19 @@ def sort_shapes_by_position(shapes: List[ShapeData]) -> List[ShapeData]:
             row.append(shape)
         else:
             # 按左侧位置排序当前行并添加到结果
-            result.extend(sorted(row, key=lambda s: s.left))
+            result.extend(sorted(row, key=by_left))
             row = [shape]
             row_top = shape.top
 
     # 不要忘记最后一行
-    result.extend(sorted(row, key=lambda s: s.left))
+    result.extend(sorted(row, key=by_left))
     return result
 
 
 def calculate_overlap(
     rect1: Tuple[float, float, float, float],
     rect2: Tuple[float, float, float, float],
-    tolerance: float = 0.05,
+    tolerance: float = OVERLAP_TOLERANCE,
 ) -> Tuple[bool, float]:
     """计算两个矩形是否重叠以及重叠程度。
 
@@ -865,12 +1039,14 @@ def calculate_overlap(
     left1, top1, w1, h1 = rect1
     left2, top2, w2, h2 = rect2
 
-    # 计算重叠尺寸
+    # 计算重叠尺寸；水平方向不重叠时无需再计算垂直方向
     overlap_width = min(left1 + w1, left2 + w2) - max(left1, left2)
+    if overlap_width <= tolerance:
+        return False, 0
     overlap_height = min(top1 + h1, top2 + h2) - max(top1, top2)
 
     # 检查是否有有意义的重叠（超过容差）
-    if overlap_width > tolerance and overlap_height > tolerance:
+    if overlap_height > tolerance:
         # 计算重叠面积（平方英寸）
         overlap_area = overlap_width * overlap_height
         return True, round(overlap_area, 2)
@@ -887,48 +1063,41 @@ def detect_overlaps(shapes: List[ShapeData]) -> None:
     参数：
         shapes: 已设置 shape_id 属性的 ShapeData 对象列表
     """
-    n = len(shapes)
-
-    # 比较每对形状
-    for i in range(n):
-        for j in range(i + 1, n):
-            shape1 = shapes[i]
-            shape2 = shapes[j]
-
-            # 确保形状 ID 已设置
-            assert shape1.shape_id, f"索引 {i} 处的形状没有 shape_id"
-            assert shape2.shape_id, f"索引 {j} 处的形状没有 shape_id"
-
-            rect1 = (shape1.left, shape1.top, shape1.width, shape1.height)
-            rect2 = (shape2.left, shape2.top, shape2.width, shape2.height)
-
-            overlaps, overlap_area = calculate_overlap(rect1, rect2)
-
+    for i, shape in enumerate(shapes):
+        # 确保形状 ID 已设置
+        assert shape.shape_id, f"索引 {i} 处的形状没有 shape_id"
+
+    rects = [(s.left, s.top, s.width, s.height) for s in shapes]
+
+    # 按左边缘扫描：只与右边缘仍超过当前左边缘（加容差）的形状比较，避免逐对比较。
+    # 重叠宽度不超过 right - left，而之后的 left 只会更大，被移出的形状不会再重叠。
+    pairs = []
+    active = []
+    for j in sorted(range(len(rects)), key=lambda idx: rects[idx][0]):
+        left = rects[j][0]
+        active = [entry for entry in active if entry[0] - left > OVERLAP_TOLERANCE]
+        for _, i in active:
+            overlaps, overlap_area = calculate_overlap(
+                rects[min(i, j)], rects[max(i, j)]
+            )
             if overlaps:
-                # 添加带有重叠面积（平方英寸）的形状 ID
-                shape1.overlapping_shapes[shape2.shape_id] = overlap_area
-                shape2.overlapping_shapes[shape1.shape_id] = overlap_area
+                pairs.append((min(i, j), max(i, j), overlap_area))
+        active.append((left + rects[j][2], j))
 
+    # 按 (i, j) 顺序写入，重叠字典的键顺序与逐对比较时相同
+    for i, j, overlap_area in sorted(pairs):
+        # 添加带有重叠面积（平方英寸）的形状 ID
+        shapes[i].overlapping_shapes[shapes[j].shape_id] = overlap_area
+        shapes[j].overlapping_shapes[shapes[i].shape_id] = overlap_area
 
-def extract_text_inventory(
-    pptx_path: Path, prs: Optional[Any] = None, issues_only: bool = False
-) -> InventoryData:
-    """从 PowerPoint 演示文稿的所有幻灯片中提取文本内容。
 
-    参数：
-        pptx_path: PowerPoint 文件路径
-        prs: 可选的 Presentation 对象。如果未提供，将从 pptx_path 加载。
-        issues_only: 如果为 True，仅包含有溢出或重叠问题的形状
+def _iter_slide_shapes(
+    prs: Any, issues_only: bool = False
+) -> Iterator[Tuple[str, List[ShapeData]]]:
+    """逐张幻灯片生成 (幻灯片键, 已排序且分配 ID 的 ShapeData 列表)。
 
-    返回嵌套字典：{slide-N: {shape-N: ShapeData}}
-    形状按视觉位置排序（从上到下，从左到右）。
-    ShapeData 对象包含完整的形状信息，可以使用 to_dict() 方法
-    转换为字典以便 JSON 序列化。
+    没有（符合条件的）形状的幻灯片会被跳过。
     """
-    if prs is None:
-        prs = Presentation(str(pptx_path))
-    inventory: InventoryData = {}
-
     for slide_idx, slide in enumerate(prs.slides):
         # 从此幻灯片收集所有具有绝对位置的有效形状
         shapes_with_positions = []
@@ -952,7 +1121,9 @@ def extract_text_inventory(
         # 按视觉位置排序并一步分配稳定的 ID
         sorted_shapes = sort_shapes_by_position(shape_data_list)
         for idx, shape_data in enumerate(sorted_shapes):
-            shape_data.shape_id = f"shape-{idx}"
+            shape_data.shape_id = (
+                _SHAPE_IDS[idx] if idx < len(_SHAPE_IDS) else f"shape-{idx}"
+            )
 
         # 使用稳定的形状 ID 检测重叠
         if len(sorted_shapes) > 1:
@@ -965,20 +1136,40 @@ def extract_text_inventory(
         if not sorted_shapes:
             continue
 
-        # 使用稳定的形状 ID 创建幻灯片清单
-        inventory[f"slide-{slide_idx}"] = {
-            shape_data.shape_id: shape_data for shape_data in sorted_shapes
-        }
+        yield f"slide-{slide_idx}", sorted_shapes
 
-    return inventory
+
+def extract_text_inventory(
+    pptx_path: Path, prs: Optional[Any] = None, issues_only: bool = False
+) -> InventoryData:
+    """从 PowerPoint 演示文稿的所有幻灯片中提取文本内容。
+
+    参数：
+        pptx_path: PowerPoint 文件路径
+        prs: 可选的 Presentation 对象。如果未提供，将从 pptx_path 加载。
+        issues_only: 如果为 True，仅包含有溢出或重叠问题的形状
+
+    返回嵌套字典：{slide-N: {shape-N: ShapeData}}
+    形状按视觉位置排序（从上到下，从左到右）。
+    ShapeData 对象包含完整的形状信息，可以使用 to_dict() 方法
+    转换为字典以便 JSON 序列化。
+    """
+    if prs is None:
+        prs = Presentation(str(pptx_path))
+
+    # 使用稳定的形状 ID 创建各幻灯片清单
+    return {
+        slide_key: {shape_data.shape_id: shape_data for shape_data in shapes}
+        for slide_key, shapes in _iter_slide_shapes(prs, issues_only)
+    }
 
 
 def get_inventory_as_dict(pptx_path: Path, issues_only: bool = False) -> InventoryDict:
     """提取文本清单并返回可序列化为 JSON 的字典。
 
-    这是 extract_text_inventory 的便捷包装器，返回
-    字典而不是 ShapeData 对象，适用于测试和直接
-    JSON 序列化。
+    与 extract_text_inventory 相同，但每张幻灯片处理完后立即转换为字典，
+    不再对整个清单做第二次遍历，ShapeData 对象也可随之尽早释放。
+    适用于测试和直接 JSON 序列化。
 
     参数：
         pptx_path: PowerPoint 文件路径
@@ -987,32 +1178,46 @@ def get_inventory_as_dict(pptx_path: Path, issues_only: bool = False) -> Invento
     返回：
         所有数据已序列化为 JSON 的嵌套字典
     """
-    inventory = extract_text_inventory(pptx_path, issues_only=issues_only)
+    prs = Presentation(str(pptx_path))
+    return {
+        slide_key: {shape_data.shape_id: shape_data.to_dict() for shape_data in shapes}
+        for slide_key, shapes in _iter_slide_shapes(prs, issues_only)
+    }
 
-    # 将 ShapeData 对象转换为字典
-    dict_inventory: InventoryDict = {}
-    for slide_key, shapes in inventory.items():
-        dict_inventory[slide_key] = {
-            shape_key: shape_data.to_dict() for shape_key, shape_data in shapes.items()
-        }
 
-    return dict_inventory
+def _dumps_indented(obj: Any) -> bytes:
+    """以 2 空格缩进将对象编码为 UTF-8 JSON 字节串。"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
 
 
 def save_inventory(inventory: InventoryData, output_path: Path) -> None:
     """将清单保存为格式正确的 JSON 文件。
 
-    将 ShapeData 对象转换为字典以便 JSON 序列化。
+    逐张幻灯片转换并写入，内存峰值取决于最大的单张幻灯片而非整个演示文稿；
+    输出与一次性编码整个清单完全相同。
     """
-    # 将 ShapeData 对象转换为字典
-    json_inventory: InventoryDict = {}
-    for slide_key, shapes in inventory.items():
-        json_inventory[slide_key] = {
-            shape_key: shape_data.to_dict() for shape_key, shape_data in shapes.items()
-        }
+    with open(output_path, "wb") as f:
+        if not inventory:
+            f.write(b"{}")
+            return
 
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(json_inventory, f, indent=2, ensure_ascii=False)
+        separator = b"{\n  "
+        for slide_key, shapes in inventory.items():
+            slide_json = _dumps_indented(
+                {
+                    shape_key: shape_data.to_dict()
+                    for shape_key, shape_data in shapes.items()
+                }
+            )
+            # JSON 字符串内的换行均已转义，因此可以安全地整体增加一级缩进
+            f.write(separator)
+            f.write(_dumps_indented(slide_key))
+            f.write(b": ")
+            f.write(slide_json.replace(b"\n", b"\n  "))
+            separator = b",\n  "
+        f.write(b"\n}")
 
 
 if __name__ == "__main__":
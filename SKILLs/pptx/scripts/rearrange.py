@@ -12,12 +12,22 @@
 import argparse
 import shutil
 import sys
+from bisect import bisect_left
+from collections import Counter
 from copy import deepcopy
 from pathlib import Path
 
 import six
+from lxml import etree
 from pptx import Presentation
 
+_A_NS = "http://schemas.openxmlformats.org/drawingml/2006/main"
+_R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+# 带 r:embed 引用的 blip 元素（它们可能在 pic 或其他上下文中），预编译一次
+_BLIP_XPATH = etree.XPath(".//a:blip[@r:embed]", namespaces={"a": _A_NS, "r": _R_NS})
+_R_EMBED = f"{{{_R_NS}}}embed"
+
 
 def main():
     parser = argparse.ArgumentParser(
@@ -90,6 +100,16 @@ def duplicate_slide(pres, index):
         sp = shape.element
         sp.getparent().remove(sp)
 
+    # 在目标幻灯片中为每个图像/媒体关系预先创建关系（包括可能在其他地方
+    # 被引用的关系），并记录旧 rId 到新 rId 的映射，供下方 blip 复用
+    new_rIds = {}
+    for rel_id, rel in image_rels.items():
+        try:
+            # get_or_add 直接返回 rId，或添加后返回新的 rId
+            new_rIds[rel_id] = new_slide.part.rels.get_or_add(rel.reltype, rel._target)
+        except Exception:
+            pass  # 无法复制的关系保持原样
+
     # 从源幻灯片复制所有形状
     for shape in source.shapes:
         el = shape.element
@@ -97,32 +117,11 @@ def duplicate_slide(pres, index):
         new_slide.shapes._spTree.insert_element_before(new_el, "p:extLst")
 
         # 处理图片形状 - 需要更新 blip 引用
-        # 查找所有 blip 元素（它们可能在 pic 或其他上下文中）
-        # 使用元素自身的 xpath 方法，不带命名空间参数
-        blips = new_el.xpath(".//a:blip[@r:embed]")
-        for blip in blips:
-            old_rId = blip.get(
-                "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed"
-            )
-            if old_rId in image_rels:
-                # 为此图像在目标幻灯片中创建新关系
-                old_rel = image_rels[old_rId]
-                # get_or_add 直接返回 rId，或添加后返回新的 rId
-                new_rId = new_slide.part.rels.get_or_add(
-                    old_rel.reltype, old_rel._target
-                )
+        for blip in _BLIP_XPATH(new_el):
+            old_rId = blip.get(_R_EMBED)
+            if old_rId in new_rIds:
                 # 更新 blip 的 embed 引用以使用新的关系 ID
-                blip.set(
-                    "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed",
-                    new_rId,
-                )
-
-    # 复制可能在其他地方被引用的任何其他图像/媒体关系
-    for rel_id, rel in image_rels.items():
-        try:
-            new_slide.part.rels.get_or_add(rel.reltype, rel._target)
-        except Exception:
-            pass  # 关系可能已存在
+                blip.set(_R_EMBED, new_rIds[old_rId])
 
     return new_slide
 
@@ -134,16 +133,21 @@ def delete_slide(pres, index):
     del pres.slides._sldIdLst[index]
 
 
-def reorder_slides(pres, slide_index, target_index):
-    """将幻灯片从一个位置移动到另一个位置。"""
-    slides = pres.slides._sldIdLst
+def reorder_slides(pres, order):
+    """按给定顺序重新排列全部幻灯片。
 
-    # 从当前位置移除幻灯片元素
-    slide_element = slides[slide_index]
-    slides.remove(slide_element)
+    参数：
+        pres: 演示文稿对象
+        order: 当前幻灯片索引的排列，order[k] 为最终位于第 k 位的幻灯片
+    """
+    slides = pres.slides._sldIdLst
+    elements = list(slides)
 
-    # 插入到目标位置
-    slides.insert(target_index, slide_element)
+    # 整体移除后按目标顺序重新追加，避免逐个移动带来的索引修正
+    for slide_element in elements:
+        slides.remove(slide_element)
+    for idx in order:
+        slides.append(elements[idx])
 
 
 def rearrange_presentation(template_path, output_path, slide_sequence):
@@ -172,6 +176,7 @@ def rearrange_presentation(template_path, output_path, slide_sequence):
     # 跟踪原始幻灯片及其副本
     slide_map = []  # 最终演示文稿的实际幻灯片索引列表
     duplicated = {}  # 跟踪副本：original_idx -> [duplicate_indices]
+    counts = Counter(slide_sequence)  # 每张幻灯片在序列中出现的次数
 
     # 步骤 1：复制重复的幻灯片
     print(f"正在处理模板中的 {len(slide_sequence)} 张幻灯片...")
@@ -180,11 +185,11 @@ def rearrange_presentation(template_path, output_path, slide_sequence):
             # 已复制此幻灯片，使用副本
             slide_map.append(duplicated[template_idx].pop(0))
             print(f"  [{i}] 使用幻灯片 {template_idx} 的副本")
-        elif slide_sequence.count(template_idx) > 1 and template_idx not in duplicated:
+        elif counts[template_idx] > 1 and template_idx not in duplicated:
             # 重复幻灯片的首次出现 - 创建副本
             slide_map.append(template_idx)
             duplicates = []
-            count = slide_sequence.count(template_idx) - 1
+            count = counts[template_idx] - 1
             print(
                 f"  [{i}] 使用原始幻灯片 {template_idx}，创建 {count} 个副本"
             )
@@ -199,27 +204,16 @@ def rearrange_presentation(template_path, output_path, slide_sequence):
 
     # 步骤 2：删除不需要的幻灯片（倒序处理）
     slides_to_keep = set(slide_map)
-    print(f"\n正在删除 {len(prs.slides) - len(slides_to_keep)} 张未使用的幻灯片...")
-    for i in range(len(prs.slides) - 1, -1, -1):
-        if i not in slides_to_keep:
-            delete_slide(prs, i)
-            # 删除后更新 slide_map 索引
-            slide_map = [idx - 1 if idx > i else idx for idx in slide_map]
+    deleted = [i for i in range(len(prs.slides)) if i not in slides_to_keep]
+    print(f"\n正在删除 {len(deleted)} 张未使用的幻灯片...")
+    for i in reversed(deleted):
+        delete_slide(prs, i)
+    # 一次性更新 slide_map 索引：减去位于其前面的已删除幻灯片数
+    slide_map = [idx - bisect_left(deleted, idx) for idx in slide_map]
 
     # 步骤 3：重新排序为最终序列
     print(f"正在将 {len(slide_map)} 张幻灯片重新排序为最终序列...")
-    for target_pos in range(len(slide_map)):
-        # 查找哪张幻灯片应该在 target_pos 位置
-        current_pos = slide_map[target_pos]
-        if current_pos != target_pos:
-            reorder_slides(prs, current_pos, target_pos)
-            # 更新 slide_map：移动会改变其他幻灯片的位置
-            for i in range(len(slide_map)):
-                if slide_map[i] > current_pos and slide_map[i] <= target_pos:
-                    slide_map[i] -= 1
-                elif slide_map[i] < current_pos and slide_map[i] >= target_pos:
-                    slide_map[i] += 1
-            slide_map[target_pos] = target_pos
+    reorder_slides(prs, slide_map)
 
     # 保存演示文稿
     prs.save(output_path)
@@ -18,8 +18,22 @@ import re
 import yaml
 from pathlib import Path
 
+try:
+    from yaml import CSafeLoader as YamlSafeLoader
+except ImportError:  # 未编译 libyaml 时回退到纯 Python 实现
+    from yaml import SafeLoader as YamlSafeLoader
+
 SKILLS_BASE_PATH = Path("/home/ubuntu/skills")
 
+# 前置元数据块（文件开头两个 --- 之间的内容）
+FRONTMATTER_RE = re.compile(r'^---\n(.*?)\n---', re.DOTALL)
+
+# 短横线命名法：小写字母、数字和短横线
+SKILL_NAME_RE = re.compile(r'^[a-z0-9-]+$')
+
+# 验证时从 SKILL.md 开头预读的字符数，前置元数据通常远小于此值
+FRONTMATTER_READ_SIZE = 16384
+
 
 def resolve_skill_path(skill_path_or_name):
     """
@@ -38,6 +52,20 @@ def resolve_skill_path(skill_path_or_name):
     return SKILLS_BASE_PATH / skill_path_or_name
 
 
+def read_skill_md_head(skill_md):
+    """
+    读取 SKILL.md 中包含前置元数据的开头部分。
+    
+    只预读文件开头的 FRONTMATTER_READ_SIZE 个字符；仅当前置元数据
+    在此范围内没有闭合时，才继续读取文件的剩余内容。
+    """
+    with skill_md.open() as f:
+        content = f.read(FRONTMATTER_READ_SIZE)
+        if content.startswith('---') and not FRONTMATTER_RE.match(content):
+            content += f.read()
+    return content
+
+
 def validate_skill(skill_path_or_name):
     """对技能进行基本验证"""
     skill_path = resolve_skill_path(skill_path_or_name)
@@ -48,12 +76,12 @@ def validate_skill(skill_path_or_name):
         return False, "未找到 SKILL.md 文件"
 
     # 读取并验证前置元数据
-    content = skill_md.read_text()
+    content = read_skill_md_head(skill_md)
     if not content.startswith('---'):
         return False, "未找到 YAML 前置元数据"
 
     # 提取前置元数据
-    match = re.match(r'^---\n(.*?)\n---', content, re.DOTALL)
+    match = FRONTMATTER_RE.match(content)
     if not match:
         return False, "前置元数据格式无效"
 
@@ -61,7 +89,7 @@ def validate_skill(skill_path_or_name):
 
     # 解析 YAML 前置元数据
     try:
-        frontmatter = yaml.safe_load(frontmatter_text)
+        frontmatter = yaml.load(frontmatter_text, Loader=YamlSafeLoader)
         if not isinstance(frontmatter, dict):
             return False, "前置元数据必须是 YAML 字典格式"
     except yaml.YAMLError as e:
@@ -91,7 +119,7 @@ def validate_skill(skill_path_or_name):
     name = name.strip()
     if name:
         # 检查命名规范（短横线命名法：小写字母、数字和短横线）
-        if not re.match(r'^[a-z0-9-]+$', name):
+        if not SKILL_NAME_RE.match(name):
             return False, f"名称 '{name}' 应使用短横线命名法（仅包含小写字母、数字和短横线）"
         if name.startswith('-') or name.endswith('-') or '--' in name:
             return False, f"名称 '{name}' 不能以短横线开头或结尾，也不能包含连续的短横线"
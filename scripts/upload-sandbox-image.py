@@ -13,14 +13,23 @@
 环境变量:
     LUNA_NOS_URL: Luna NOS 上传接口地址
     LUNA_NOS_PRODUCT: 产品名称标识符
+
+可选依赖:
+    requests-toolbelt: 安装后以流式方式发送上传请求体，避免将整个镜像读入内存
 """
 
 import os
 import sys
 import hashlib
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 import requests
 
+try:
+    from requests_toolbelt import MultipartEncoder
+except ImportError:  # requests-toolbelt 为可选依赖，缺失时回退到 requests 自带的编码
+    MultipartEncoder = None
+
 # ============================================================================
 # 全局配置常量
 # ============================================================================
@@ -44,42 +53,36 @@ ROOT_DIR = os.path.dirname(SCRIPT_DIR)
 DEFAULT_INPUT_DIR = os.path.join(ROOT_DIR, "sandbox", "image", "out")
 
 
-def sha256_file(file_path: str) -> str:
+class HashingReader:
     """
-    计算文件的 SHA256 哈希值。
-    
-    使用分块读取方式处理大文件，避免内存溢出。
+    在读取文件的同时计算其哈希值的文件包装器。
     
-    参数:
-        file_path: 要计算哈希值的文件路径
-        
-    返回:
-        str: 文件的 SHA256 哈希值（十六进制字符串）
+    上传时由 requests（或 MultipartEncoder）调用 read() 读取文件内容，
+    读到的每一块数据都会同时更新哈希值，使哈希计算与上传共用同一次磁盘读取。
+    其余属性（如 fileno、tell）直接转发给被包装的文件对象。
     
     示例:
-        >>> hash_value = sha256_file("/path/to/file.qcow2")
-        >>> print(hash_value)
+        >>> with open("/path/to/file.qcow2", "rb") as f:
+        ...     reader = HashingReader(f, hashlib.sha256())
+        ...     data = reader.read()
+        >>> print(reader.hasher.hexdigest())
         'a1b2c3d4e5f6...'
     """
-    # 创建 SHA256 哈希对象
-    h = hashlib.sha256()
-    
-    # 以二进制模式打开文件
-    with open(file_path, "rb") as f:
-        # 分块读取文件，每次读取 8192 字节（8KB）
-        while True:
-            chunk = f.read(8192)
-            # 如果读取到文件末尾，退出循环
-            if not chunk:
-                break
-            # 更新哈希值
-            h.update(chunk)
-    
-    # 返回十六进制格式的哈希值
-    return h.hexdigest()
 
+    def __init__(self, f, hasher):
+        self.f = f
+        self.hasher = hasher
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self.f.read(size)
+        self.hasher.update(chunk)
+        return chunk
 
-def upload_file(file_path: str) -> str | None:
+    def __getattr__(self, name):
+        return getattr(self.f, name)
+
+
+def upload_file(file_path: str, hasher=None) -> str | None:
     """
     上传文件到 Luna NOS 并返回 CDN URL。
     
@@ -88,6 +91,8 @@ def upload_file(file_path: str) -> str | None:
     
     参数:
         file_path: 要上传的文件路径
+        hasher: 可选的 hashlib 哈希对象，上传过程中读取的文件内容会同时
+            更新到其中；仅在上传成功时其结果才覆盖完整文件
         
     返回:
         str | None: 上传成功返回 CDN URL，失败返回 None
@@ -125,6 +130,10 @@ def upload_file(file_path: str) -> str | None:
 
     # 打开文件并上传
     with open(file_path, "rb") as f:
+        # 需要哈希值时，在上传读取文件的同时计算，避免再读一遍磁盘
+        if hasher is not None:
+            f = HashingReader(f, hasher)
+
         # 构造 multipart/form-data 格式的文件上传数据
         # files 参数: 文件字段名、文件名、文件对象、MIME 类型
         files = {"file": (file_name, f, media_type)}
@@ -134,10 +143,21 @@ def upload_file(file_path: str) -> str | None:
         # useHttps: 是否使用 HTTPS 协议
         data = {"product": LUNA_NOS_PRODUCT, "useHttps": "true"}
 
+        if MultipartEncoder is not None:
+            # 使用 MultipartEncoder 从磁盘逐块流式发送请求体，
+            # 避免 requests 先把整个 multipart 请求体读入内存
+            encoder = MultipartEncoder(fields={**data, **files})
+            post_kwargs = {
+                "data": encoder,
+                "headers": {"Content-Type": encoder.content_type},
+            }
+        else:
+            post_kwargs = {"files": files, "data": data}
+
         try:
             # 发送 POST 请求上传文件
             # timeout=600: 设置超时时间为 600 秒（10 分钟），适应大文件上传
-            response = requests.post(LUNA_NOS_URL, files=files, data=data, timeout=600)
+            response = requests.post(LUNA_NOS_URL, timeout=600, **post_kwargs)
             
             # 检查响应状态码，如果不是 2xx 会抛出异常
             response.raise_for_status()
@@ -167,6 +187,47 @@ def upload_file(file_path: str) -> str | None:
         return None
 
 
+def upload_arch_image(arch: str, input_dir: str) -> dict | None:
+    """
+    上传指定架构的 qcow2 镜像，并计算其 SHA256 哈希值。
+    
+    参数:
+        arch: CPU 架构名称（amd64 或 arm64）
+        input_dir: 镜像所在目录
+        
+    返回:
+        dict | None: 上传成功返回包含 url 和 sha256 的字典，
+        文件不存在或上传失败返回 None
+    """
+    # 构造 qcow2 镜像文件路径
+    # 文件名格式: linux-{arch}.qcow2
+    qcow2_path = os.path.join(input_dir, f"linux-{arch}.qcow2")
+    
+    # 检查文件是否存在
+    if not os.path.isfile(qcow2_path):
+        print(f"[{arch}] 已跳过: 未找到文件 {qcow2_path}")
+        return None
+
+    # 打印文件信息
+    print(f"[{arch}] 文件: {qcow2_path}")
+
+    # 上传文件到 CDN，同时计算文件的 SHA256 哈希值（用于校验文件完整性）
+    hasher = hashlib.sha256()
+    url = upload_file(qcow2_path, hasher)
+
+    if not url:
+        # 上传失败
+        print(f"[{arch}] 上传失败")
+        return None
+
+    # 上传成功时文件已被完整读取，哈希值覆盖整个文件
+    file_hash = hasher.hexdigest()
+    print(f"[{arch}] SHA256: {file_hash}")
+
+    # 上传成功，返回结果
+    return {"url": url, "sha256": file_hash}
+
+
 def main():
     """
     主函数：解析命令行参数并执行上传流程。
@@ -174,10 +235,9 @@ def main():
     此函数完成以下工作:
     1. 解析命令行参数（架构类型、输入目录）
     2. 验证环境变量和输入目录
-    3. 遍历指定架构的镜像文件
-    4. 计算文件 SHA256 哈希值
-    5. 上传文件到 CDN
-    6. 输出上传结果和更新代码片段
+    3. 并行处理指定架构的镜像文件
+    4. 上传文件到 CDN，同时在读取文件时计算 SHA256 哈希值
+    5. 输出上传结果和更新代码片段
     
     命令行参数:
         --arch: 指定要上传的架构（amd64、arm64 或 all）
@@ -240,35 +300,16 @@ def main():
     print("=" * 60)
     print()
 
-    # 遍历每个架构进行上传
-    for arch in archs:
-        # 构造 qcow2 镜像文件路径
-        # 文件名格式: linux-{arch}.qcow2
-        qcow2_path = os.path.join(input_dir, f"linux-{arch}.qcow2")
-        
-        # 检查文件是否存在
-        if not os.path.isfile(qcow2_path):
-            print(f"[{arch}] 已跳过: 未找到文件 {qcow2_path}")
-            continue
-
-        # 计算文件的 SHA256 哈希值（用于校验文件完整性）
-        file_hash = sha256_file(qcow2_path)
-        
-        # 打印文件信息
-        print(f"[{arch}] 文件: {qcow2_path}")
-        print(f"[{arch}] SHA256: {file_hash}")
-
-        # 上传文件到 CDN
-        url = upload_file(qcow2_path)
-        
-        if url:
-            # 上传成功，保存结果
-            results[arch] = {"url": url, "sha256": file_hash}
-        else:
-            # 上传失败
-            print(f"[{arch}] 上传失败")
+    # 各架构的上传相互独立且受网络带宽限制，并行处理
+    # 结果按 archs 的顺序收集，保证摘要输出顺序稳定
+    with ThreadPoolExecutor(max_workers=len(archs)) as executor:
+        for arch, info in zip(
+            archs, executor.map(upload_arch_image, archs, [input_dir] * len(archs))
+        ):
+            if info:
+                results[arch] = info
 
-        print()
+    print()
 
     # 检查是否有成功上传的镜像
     if not results: